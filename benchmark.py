@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+BLACK MUMBA - Provisioning benchmark
+Drives BLACK_MUMBASetup end-to-end against simulated pkg/pip/git backends
+so performance changes can be measured on plain Linux, without a phone or network.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import contextlib
+from collections import Counter
+from typing import List, Dict
+
+import setup as bm
+
+# Simulated backend shared by every fake executable; behaviour comes from $BM_BENCH_CONFIG
+FAKE_BACKEND = r'''#!{python}
+import fcntl, json, os, random, sys, time
+
+name = os.path.basename(sys.argv[0])
+args = sys.argv[1:]
+with open(os.environ["BM_BENCH_CONFIG"]) as f:
+    config = json.load(f)
+
+packages = []
+if "install" in args:
+    packages = [a for a in args[args.index("install") + 1:] if not a.startswith("-")]
+if "--print-uris" in args:
+    # Prefetch query: report every archive as already cached
+    packages = []
+
+start = time.time()
+lock_wait = 0.0
+lock_file = None
+if name in ("pkg", "apt", "apt-get", "dpkg") and args[:1] != ["--print-architecture"] and "--print-uris" not in args:
+    # Emulate the dpkg frontend lock: concurrent package managers queue up here
+    lock_file = open(os.path.join(config["prefix"], "var", "lib", "dpkg", "lock"), "w")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    lock_wait = time.time() - start
+
+time.sleep(config["latency"].get(name, config["latency"]["default"]) + config["per_package"] * len(packages))
+
+rng = random.Random(f"{{config['seed']}}:{{' '.join(sys.argv[1:])}}")
+failed = any(p in config["fail_packages"] for p in packages) or rng.random() < config["fail_rate"]
+
+if not failed:
+    for i, package in enumerate(packages, 1):
+        print(f"Get:{{i}} https://bench.invalid/apt stable/main {{package}} 1.0 [100 kB]")
+    for package in packages:
+        print(f"Setting up {{package}} (1.0) ...")
+    if name in ("pkg", "apt", "apt-get") and packages:
+        with open(os.path.join(config["prefix"], "var", "lib", "dpkg", "status"), "a") as f:
+            for package in packages:
+                f.write(f"Package: {{package}}\nStatus: install ok installed\nVersion: 1.0\n\n")
+    if name == "pip" and packages:
+        # Sandbox stand-in for site-packages metadata, read back by Sandbox.read_pip_metadata
+        with open(config["pip_state"], "a") as f:
+            for package in packages:
+                f.write(package.split("==")[0] + "\n")
+    if name == "git" and args[:1] == ["clone"]:
+        target = args[-1]
+        os.makedirs(os.path.join(target, ".git"), exist_ok=True)
+        open(os.path.join(target, "sqlmap.py"), "w").close()
+    if name == "apt-cache" and args[:1] == ["depends"]:
+        for package in args[1:]:
+            if not package.startswith("-"):
+                print(package)
+
+if lock_file:
+    lock_file.close()
+
+with open(config["log"], "a") as f:
+    f.write(json.dumps({{"program": name, "args": args, "start": start, "end": time.time(),
+                        "lock_wait": lock_wait, "failed": failed}}) + "\n")
+sys.exit(100 if failed else 0)
+'''
+
+FAKE_PROGRAMS = [
+    "pkg", "apt", "apt-get", "apt-cache", "dpkg", "pip", "git",
+    "termux-setup-storage", "termux-fix-shebang"
+]
+
+SCENARIOS = {
+    "full": ("Full Termux Setup", lambda s: s.full_setup()),
+    "tools": ("Install Tools Only", lambda s: (s.install_core_packages(), s.install_security_tools())),
+    "update": ("Update All Packages", lambda s: s.update_all()),
+    "fix": ("Fix Broken Termux", lambda s: s.fix_broken_termux()),
+    "python": ("Install Python Modules", lambda s: s.install_python_modules()),
+    "security": ("Install Security Tools", lambda s: s.install_security_tools()),
+    "extra": ("Install Extra Utilities", lambda s: s.install_extra_utilities()),
+}
+
+
+class BenchSetup(bm.BLACK_MUMBASetup):
+    """Setup instance that runs outside Termux and skips network probes"""
+
+    def check_termux(self) -> bool:
+        return True
+
+    def __init__(self, pip_index: str, bin_dir: str):
+        super().__init__()
+        self.mirror_candidates = []
+        # Sandbox index instead of pypi.org so update runs stay offline
+        self.pip_index = pip_index
+        self.bin_dir = bin_dir
+
+    def verification_path(self) -> str:
+        # Probe only the fake backends; host binaries would make timings machine-dependent
+        return self.bin_dir
+
+
+class Sandbox:
+    """Throwaway HOME/PREFIX with fake backends first on PATH"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.root = tempfile.mkdtemp(prefix="bm-bench-")
+        self.home = os.path.join(self.root, "home")
+        self.prefix = os.path.join(self.root, "usr")
+        self.bin_dir = os.path.join(self.root, "fakebin")
+        self.log = os.path.join(self.root, "commands.jsonl")
+        self.config = os.path.join(self.root, "config.json")
+        self.pip_state = os.path.join(self.root, "pip-installed.txt")
+        self.pip_index = os.path.join(self.root, "simple")
+
+        os.makedirs(self.home)
+        os.makedirs(os.path.join(self.prefix, "var", "lib", "dpkg"))
+        os.makedirs(os.path.join(self.prefix, "etc", "apt"))
+        os.makedirs(self.bin_dir)
+        open(os.path.join(self.prefix, "var", "lib", "dpkg", "status"), "w").close()
+        open(self.pip_state, "w").close()
+
+        # Local simple index listing every managed module at the version the fake pip installs
+        for module in bm.DEFAULT_PROFILE["python"]:
+            project = os.path.join(self.pip_index, bm.normalize_module_name(module))
+            os.makedirs(project)
+            open(os.path.join(project, f"{module}-1.0-py3-none-any.whl"), "w").close()
+
+        latency = {"default": args.latency, "pkg": args.pkg_latency, "apt-get": args.pkg_latency,
+                   "pip": args.pip_latency, "git": args.git_latency}
+        with open(self.config, "w") as f:
+            json.dump({
+                "latency": latency,
+                "per_package": args.per_package,
+                "fail_rate": args.fail_rate,
+                "fail_packages": args.fail_package,
+                "seed": args.seed,
+                "prefix": self.prefix,
+                "pip_state": self.pip_state,
+                "log": self.log
+            }, f)
+
+        script = FAKE_BACKEND.format(python=sys.executable)
+        for program in FAKE_PROGRAMS:
+            path = os.path.join(self.bin_dir, program)
+            with open(path, "w") as f:
+                f.write(script)
+            os.chmod(path, 0o755)
+
+    def read_pip_metadata(self) -> Dict[str, str]:
+        with open(self.pip_state) as f:
+            return {bm.normalize_module_name(line.strip()): "1.0" for line in f if line.strip()}
+
+    @contextlib.contextmanager
+    def activate(self):
+        saved = {key: os.environ.get(key) for key in ("HOME", "PREFIX", "PATH", "BM_BENCH_CONFIG")}
+        saved_metadata = bm.InstalledIndex.__dict__["read_pip_metadata"]
+        saved_timer = bm.time_shell_startup
+        cwd = os.getcwd()
+        os.environ.update({
+            "HOME": self.home,
+            "PREFIX": self.prefix,
+            "PATH": f"{self.bin_dir}{os.pathsep}{saved['PATH'] or ''}",
+            "BM_BENCH_CONFIG": self.config
+        })
+        # Keep the host's site-packages out of installed-state checks
+        bm.InstalledIndex.read_pip_metadata = staticmethod(self.read_pip_metadata)
+        # Interactive bash would read the host's /etc/bash.bashrc and add seconds of noise
+        bm.time_shell_startup = lambda rc_file, runs=3: None
+        os.chdir(self.home)
+        try:
+            yield
+        finally:
+            bm.InstalledIndex.read_pip_metadata = saved_metadata
+            bm.time_shell_startup = saved_timer
+            os.chdir(cwd)
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    def commands(self, since: int = 0) -> List[Dict]:
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as f:
+            return [json.loads(line) for line in f.readlines()[since:]]
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def run_scenario(sandbox: Sandbox, key: str, verbose: bool = False) -> Dict:
+    """Run one menu option in the sandbox and collect timings"""
+    title, action = SCENARIOS[key]
+    before = len(sandbox.commands())
+
+    with sandbox.activate():
+        setup = BenchSetup(sandbox.pip_index, sandbox.bin_dir)
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+        start = time.perf_counter()
+        with output:
+            action(setup)
+        wall = time.perf_counter() - start
+
+    commands = sandbox.commands(before)
+    return {
+        "scenario": key,
+        "title": title,
+        "wall": wall,
+        "commands": len(commands),
+        "failed": sum(1 for c in commands if c["failed"]),
+        "lock_wait": sum(c["lock_wait"] for c in commands),
+        "programs": dict(Counter(c["program"] for c in commands))
+    }
+
+
+def print_report(results: List[Dict]):
+    print(f"\n{'Scenario':<26} {'Run':>4} {'Wall':>8} {'Cmds':>5} {'Fail':>5} {'Lock wait':>10}  Programs")
+    print("-" * 90)
+    for result in results:
+        programs = ", ".join(f"{name}={count}" for name, count in sorted(result["programs"].items()))
+        print(f"{result['title']:<26} {result['run']:>4} {result['wall']:>7.2f}s {result['commands']:>5} "
+              f"{result['failed']:>5} {result['lock_wait']:>9.2f}s  {programs}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark BLACK MUMBA provisioning against simulated backends")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"menu options to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=1, help="repeat each scenario N times")
+    parser.add_argument("--warm", action="store_true",
+                        help="reuse one sandbox across runs to measure re-runs on a provisioned device")
+    parser.add_argument("--latency", type=float, default=0.02, help="base latency of other commands (s)")
+    parser.add_argument("--pkg-latency", type=float, default=0.5, help="base latency of pkg/apt-get (s)")
+    parser.add_argument("--pip-latency", type=float, default=0.3, help="base latency of pip (s)")
+    parser.add_argument("--git-latency", type=float, default=0.3, help="base latency of git (s)")
+    parser.add_argument("--per-package", type=float, default=0.02, help="extra latency per package (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="probability a command fails")
+    parser.add_argument("--fail-package", action="append", default=[], help="package that always fails to install")
+    parser.add_argument("--seed", type=int, default=0, help="seed for simulated failures")
+    parser.add_argument("--json", metavar="FILE", help="also write results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the tool's own output")
+    args = parser.parse_args(argv)
+    for key in args.scenarios:
+        if key not in SCENARIOS:
+            parser.error(f"unknown scenario: {key}")
+    return args
+
+
+def main():
+    args = parse_args()
+    scenarios = args.scenarios or list(SCENARIOS)
+    logging.disable(logging.CRITICAL)
+
+    results = []
+    sandbox = Sandbox(args) if args.warm else None
+    try:
+        for key in scenarios:
+            for run in range(1, args.runs + 1):
+                current = sandbox or Sandbox(args)
+                try:
+                    result = run_scenario(current, key, args.verbose)
+                finally:
+                    if current is not sandbox:
+                        current.cleanup()
+                result["run"] = run
+                results.append(result)
+    finally:
+        if sandbox:
+            sandbox.cleanup()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
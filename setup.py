@@ -13,44 +13,2137 @@ import time
 import logging
 import glob
 import shutil
-from typing import List, Dict, Optional
+import re
+import json
+import argparse
+import threading
+import resource
+from collections import deque
+from typing import List, Dict, Optional, Callable, Iterable, Tuple
 
-# Check for required modules before importing
-required_modules = ['colorama', 'rich']
-missing_modules = []
+# Heavy modules (rich, asyncio, concurrent.futures, urllib, tarfile) are imported
+# on first use so the menu draws quickly on low-end phones.
 
-for module in required_modules:
+def ensure_dependencies(required_modules: List[str] = ['colorama', 'rich']):
+    """Install missing third-party modules; find_spec checks without importing them"""
+    from importlib.util import find_spec
+    
+    missing_modules = [module for module in required_modules if find_spec(module) is None]
+    if missing_modules:
+        print(f"Missing modules: {', '.join(missing_modules)}")
+        print("Installing missing modules...")
+        subprocess.run([sys.executable, "-m", "pip", "install"] + missing_modules)
+
+ensure_dependencies(['colorama'])
+
+from colorama import init, Fore, Back, Style
+
+# Initialize colorama for cross-platform color support
+init(autoreset=True)
+
+# Setup logging; the log file is only opened when the first record is written
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('setup.log', delay=True),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+_console = None
+
+def get_console():
+    """Shared rich console, created on first use"""
+    global _console
+    if _console is None:
+        ensure_dependencies(['rich'])
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+def rich_table(**kwargs):
+    get_console()
+    from rich.table import Table
+    return Table(**kwargs)
+
+TERMUX_PREFIX = "/data/data/com.termux/files/usr"
+
+# rich allows a single live display at a time; concurrent commands run without a spinner
+live_display_lock = threading.Lock()
+
+
+def normalize_module_name(name: str) -> str:
+    """Normalize a pip distribution name (PEP 503)"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def sha256_file(path: str) -> str:
+    import hashlib
+    
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def deb_package_name(filename: str) -> str:
+    """Package name from a name_version_arch.deb file name"""
+    return os.path.basename(filename).split("_", 1)[0]
+
+
+def parse_size(text: str) -> int:
+    """Convert sizes like '1,234 kB' or '12.3 MB' to bytes"""
+    match = re.match(r"([\d.,]+)\s*([kKMG]i?)?B", text.strip())
+    if not match:
+        return 0
+    number = float(match.group(1).replace(",", ""))
+    unit = (match.group(2) or "").upper().rstrip("I")
+    return int(number * {"": 1, "K": 1000, "M": 1000 ** 2, "G": 1000 ** 3}[unit])
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1000 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1000
+
+
+class OutputProgress:
+    """Turn apt/dpkg and pip output lines into progress figures"""
+    
+    APT_NEED = re.compile(r"Need to get ([\d.,]+ [kMG]?B)")
+    APT_GET = re.compile(r"^Get:\d+ .*\[([\d.,]+ [kMG]?B)\]")
+    APT_COUNTS = re.compile(r"(\d+) upgraded, (\d+) newly installed")
+    DPKG_SETUP = re.compile(r"^Setting up \S+")
+    PIP_DOWNLOAD = re.compile(r"Downloading \S+ \(([\d.,]+ [kMG]?B)\)")
+    PIP_COLLECT = re.compile(r"^Collecting \S+")
+    
+    def __init__(self):
+        self.total_bytes = 0
+        self.downloaded_bytes = 0
+        self.total_units = 0
+        self.done_units = 0
+        self.phase = ""
+    
+    def feed(self, line: str) -> bool:
+        """Consume one output line, returning True if progress changed"""
+        line = line.strip()
+        match = self.APT_GET.match(line) or self.PIP_DOWNLOAD.search(line)
+        if match:
+            self.downloaded_bytes += parse_size(match.group(1))
+            self.phase = "Downloading"
+            return True
+        match = self.APT_NEED.search(line)
+        if match:
+            self.total_bytes = parse_size(match.group(1))
+            return True
+        match = self.APT_COUNTS.search(line)
+        if match:
+            self.total_units = int(match.group(1)) + int(match.group(2))
+            return True
+        if self.DPKG_SETUP.match(line):
+            self.done_units += 1
+            self.phase = "Setting up"
+            return True
+        if self.PIP_COLLECT.match(line):
+            self.phase = "Collecting"
+            return True
+        return False
+    
+    @property
+    def percentage(self) -> Optional[float]:
+        """Overall completion, or None while it cannot be estimated"""
+        download = None
+        if self.total_bytes:
+            download = min(1.0, self.downloaded_bytes / self.total_bytes)
+        if self.total_units:
+            setup = min(1.0, self.done_units / self.total_units)
+            if download is None:
+                download = 1.0 if self.done_units else 0.0
+            return 50 * download + 50 * setup
+        if download is not None:
+            return 100 * download
+        return None
+    
+    @property
+    def detail(self) -> str:
+        parts = [self.phase] if self.phase else []
+        if self.downloaded_bytes:
+            total = f"/{format_size(self.total_bytes)}" if self.total_bytes else ""
+            parts.append(f"{format_size(self.downloaded_bytes)}{total}")
+        if self.total_units:
+            parts.append(f"{self.done_units}/{self.total_units} pkgs")
+        return " ".join(parts)
+
+
+def parse_print_uris(output: str) -> List[Dict]:
+    """Parse apt-get --print-uris lines: 'URL' filename size HASH:hex"""
+    entries = []
+    for line in output.splitlines():
+        match = re.match(r"^'([^']+)'\s+(\S+)\s+(\d+)\s*(\S*)", line)
+        if not match:
+            continue
+        algorithm, _, digest = match.group(4).partition(":")
+        entries.append({
+            "url": match.group(1),
+            "filename": match.group(2),
+            "size": int(match.group(3)),
+            # apt names them SHA256, SHA512, MD5Sum ...
+            "hash": (algorithm.lower().replace("sum", ""), digest.lower()) if digest else None
+        })
+    return entries
+
+
+class RangeNotSupported(Exception):
+    pass
+
+
+class ArchivePrefetcher:
+    """Download .deb files into apt's archive cache with parallel segments, resuming partial files"""
+    
+    CHUNK = 65536
+    
+    def __init__(self, archives_dir: str, segments: int = 4, max_workers: int = 8,
+                 min_segment: int = 1024 * 1024, timeout: float = 30.0, use_aria2: Optional[bool] = None):
+        self.archives_dir = archives_dir
+        self.partial_dir = os.path.join(archives_dir, "partial")
+        self.segments = segments
+        self.max_workers = max_workers
+        self.min_segment = min_segment
+        self.timeout = timeout
+        self.use_aria2 = shutil.which("aria2c") is not None if use_aria2 is None else use_aria2
+    
+    @staticmethod
+    def verify(path: str, entry: Dict) -> bool:
+        import hashlib
+        
+        if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+            return False
+        if not entry["hash"]:
+            return True
+        algorithm, expected = entry["hash"]
+        try:
+            digest = hashlib.new(algorithm)
+        except ValueError:
+            logger.error(f"Unknown checksum type {algorithm} for {entry['filename']}")
+            return False
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest() == expected
+    
+    def plan(self, entry: Dict, single: bool = False) -> List[Tuple[int, int, str]]:
+        """Split a file into (start, end, part_path) byte ranges"""
+        count = 1 if single else max(1, min(self.segments, entry["size"] // self.min_segment))
+        step = -(-entry["size"] // count) if entry["size"] else 0
+        base = os.path.join(self.partial_dir, entry["filename"])
+        if count == 1:
+            return [(0, entry["size"] - 1, f"{base}.part0")]
+        return [(start, min(start + step, entry["size"]) - 1, f"{base}.part{i}")
+                for i, start in enumerate(range(0, entry["size"], step))]
+    
+    def fetch_segment(self, url: str, start: int, end: int, part_path: str, whole: bool) -> int:
+        """Fetch bytes start..end into part_path, continuing an earlier partial fetch"""
+        import urllib.request
+        
+        length = end - start + 1
+        have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if have > length:
+            os.remove(part_path)
+            have = 0
+        if have == length:
+            # Also covers empty files, which need no request at all
+            open(part_path, "ab").close()
+            return 0
+        
+        request = urllib.request.Request(url, headers={"Range": f"bytes={start + have}-{end}"})
+        received = 0
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status != 206:
+                if not whole:
+                    raise RangeNotSupported(url)
+                # Server ignored the range and sent the whole file: start over
+                have = 0
+            with open(part_path, "ab" if have else "wb") as out:
+                while True:
+                    chunk = response.read(self.CHUNK)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    received += len(chunk)
+        if os.path.getsize(part_path) != length:
+            raise IOError(f"short read for {os.path.basename(part_path)}")
+        return received
+    
+    def assemble(self, entry: Dict, parts: List[str]) -> bool:
+        """Join segments, verify the checksum and move the file into the archive cache"""
+        assembled = os.path.join(self.partial_dir, entry["filename"])
+        with open(assembled, "wb") as out:
+            for part in parts:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+        for part in parts:
+            os.remove(part)
+        if not self.verify(assembled, entry):
+            os.remove(assembled)
+            logger.error(f"Checksum mismatch for {entry['filename']}")
+            return False
+        os.replace(assembled, os.path.join(self.archives_dir, entry["filename"]))
+        return True
+    
+    def download_builtin(self, entries: List[Dict], stats: Dict):
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        
+        pending = list(entries)
+        single = set()
+        while pending:
+            jobs = {}
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for entry in pending:
+                    plan = self.plan(entry, entry["filename"] in single)
+                    for start, end, part in plan:
+                        future = executor.submit(self.fetch_segment, entry["url"], start, end, part, len(plan) == 1)
+                        jobs[future] = entry
+                failed = {}
+                for future in as_completed(jobs):
+                    entry = jobs[future]
+                    try:
+                        stats["bytes"] += future.result()
+                    except RangeNotSupported:
+                        failed.setdefault(entry["filename"], "range")
+                    except Exception as e:
+                        logger.error(f"Error downloading {entry['url']}: {e}")
+                        failed[entry["filename"]] = "error"
+            
+            retry = []
+            for entry in pending:
+                reason = failed.get(entry["filename"])
+                if reason == "range" and entry["filename"] not in single:
+                    # Drop the segments and fetch this file in one stream
+                    for _, _, part in self.plan(entry):
+                        if os.path.exists(part):
+                            os.remove(part)
+                    single.add(entry["filename"])
+                    retry.append(entry)
+                elif reason:
+                    stats["failed"].append(entry["filename"])
+                elif self.assemble(entry, [part for _, _, part in self.plan(entry, entry["filename"] in single)]):
+                    stats["downloaded"] += 1
+                else:
+                    stats["failed"].append(entry["filename"])
+            pending = retry
+    
+    def download_aria2(self, entries: List[Dict], stats: Dict):
+        input_path = os.path.join(self.partial_dir, "aria2-input.txt")
+        with open(input_path, "w") as f:
+            for entry in entries:
+                f.write(f"{entry['url']}\n  out={entry['filename']}\n")
+                if entry["hash"] and entry["hash"][0] in ("sha256", "sha512", "sha1", "md5"):
+                    algorithm = {"sha256": "sha-256", "sha512": "sha-512", "sha1": "sha-1"}.get(entry["hash"][0], "md5")
+                    f.write(f"  checksum={algorithm}={entry['hash'][1]}\n")
+        subprocess.run(
+            ["aria2c", f"--input-file={input_path}", f"--dir={self.partial_dir}",
+             f"--max-concurrent-downloads={self.max_workers}", f"--split={self.segments}",
+             f"--max-connection-per-server={self.segments}", f"--min-split-size={max(self.min_segment, 1024 * 1024)}",
+             "--continue=true", "--auto-file-renaming=false", "--allow-overwrite=true",
+             "--console-log-level=warn", "--summary-interval=0", "--download-result=hide"],
+            capture_output=True, text=True
+        )
+        os.remove(input_path)
+        for entry in entries:
+            path = os.path.join(self.partial_dir, entry["filename"])
+            if self.verify(path, entry):
+                stats["bytes"] += entry["size"]
+                stats["downloaded"] += 1
+                os.replace(path, os.path.join(self.archives_dir, entry["filename"]))
+            else:
+                # Leave the partial file (and aria2's control file) so a rerun resumes it
+                stats["failed"].append(entry["filename"])
+    
+    def download(self, entries: List[Dict]) -> Dict:
+        """Fetch every entry not already cached; returns counts and failures"""
+        os.makedirs(self.partial_dir, exist_ok=True)
+        stats = {"downloaded": 0, "cached": 0, "bytes": 0, "failed": [], "backend": "aria2c" if self.use_aria2 else "builtin"}
+        
+        todo = []
+        for entry in entries:
+            if self.verify(os.path.join(self.archives_dir, entry["filename"]), entry):
+                stats["cached"] += 1
+            else:
+                todo.append(entry)
+        if todo:
+            if self.use_aria2:
+                self.download_aria2(todo, stats)
+            else:
+                self.download_builtin(todo, stats)
+        return stats
+
+
+class ManagedConfig:
+    """Own marker-delimited blocks in a config file and rewrite them in place"""
+    
+    def __init__(self, path: str, comment: str = "#"):
+        self.path = path
+        self.comment = comment
+    
+    def markers(self, name: str) -> Tuple[str, str]:
+        return (f"{self.comment} >>> BLACK MUMBA {name} >>>", f"{self.comment} <<< BLACK MUMBA {name} <<<")
+    
+    def render_block(self, name: str, content: str, legacy: Iterable[str] = ()) -> Tuple[str, str, int]:
+        """(current text, text with exactly one copy of the block, stale copies removed), without writing"""
+        text = ""
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8", errors="surrogateescape") as f:
+                text = f.read()
+        
+        begin, end = self.markers(name)
+        block = f"{begin}\n{content.strip()}\n{end}\n"
+        
+        # Find every managed copy plus blocks appended unmarked by older versions
+        pattern = re.compile(re.escape(begin) + r"\n.*?" + re.escape(end) + r"\n?", re.DOTALL)
+        spans = [match.span() for match in pattern.finditer(text)]
+        for old_block in legacy:
+            index = text.find(old_block)
+            while old_block and index != -1:
+                span = (index, index + len(old_block))
+                if not any(start < span[1] and span[0] < stop for start, stop in spans):
+                    spans.append(span)
+                index = text.find(old_block, span[1])
+        spans.sort()
+        removed = len(spans)
+        
+        # Keep the block where the first copy was, or append it
+        pieces = []
+        last = 0
+        for start, stop in spans:
+            pieces.append(text[last:start])
+            if start == spans[0][0]:
+                pieces.append(block)
+            last = stop
+        pieces.append(text[last:])
+        if not spans:
+            if text and not text.endswith("\n"):
+                pieces.append("\n")
+            pieces.append(block)
+        return text, "".join(pieces), max(removed - 1, 0)
+    
+    def update_block(self, name: str, content: str, legacy: Iterable[str] = ()) -> int:
+        """Write exactly one copy of the block, returning how many stale copies were removed"""
+        text, updated, removed = self.render_block(name, content, legacy)
+        if updated != text:
+            self.write_atomic(updated)
+        return removed
+    
+    def write_atomic(self, text: str):
+        """Write a temp file next to the target and rename it over the original"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f".{os.path.basename(self.path)}.tmp")
+        with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            f.write(text)
+        if os.path.exists(self.path):
+            shutil.copymode(self.path, tmp_path)
+        os.replace(tmp_path, self.path)
+
+
+def time_shell_startup(rc_file: str, runs: int = 3) -> Optional[float]:
+    """Median seconds for an interactive bash to source rc_file and exit"""
+    bash = shutil.which("bash")
+    if not bash or not os.path.exists(rc_file):
+        return None
+    
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([bash, "--rcfile", rc_file, "-i", "-c", "exit"],
+                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+class ShebangFixer:
+    """Rewrite foreign shebangs to $PREFIX and add missing exec bits, without forking
+    
+    Git work trees are skipped so updates can still fast-forward them, and
+    interpreters under $HOME (virtualenvs) are left alone.
+    """
+    
+    SHEBANG = re.compile(rb"^#!\s*(\S*?)/[sx]?bin/(.*)$", re.DOTALL)
+    
+    def __init__(self, prefix: str, home: Optional[str] = None):
+        self.prefix = prefix.rstrip("/").encode()
+        self.home = (home or os.path.expanduser("~")).rstrip("/").encode()
+        self.stats = {"scanned": 0, "shebangs": 0, "modes": 0, "errors": 0, "repos": 0}
+    
+    def fixed_shebang(self, line: bytes) -> Optional[bytes]:
+        """Return the rewritten first line, or None if it needs no change"""
+        if not line.startswith(b"#!"):
+            return None
+        interpreter = line[2:].lstrip()
+        if interpreter.startswith(self.prefix + b"/") or interpreter.startswith(self.home + b"/"):
+            return None
+        match = self.SHEBANG.match(line)
+        if not match:
+            return None
+        return b"#!" + self.prefix + b"/bin/" + match.group(2)
+    
+    def fix_file(self, path: str, mode: int, make_executable: bool):
+        with open(path, "rb") as f:
+            first_line = f.readline(4096)
+            new_line = self.fixed_shebang(first_line)
+            if new_line is not None:
+                # Stream the rest into a sibling temp file and swap it in atomically
+                tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.shebang")
+                with open(tmp_path, "wb") as out:
+                    out.write(new_line)
+                    shutil.copyfileobj(f, out)
+                os.chmod(tmp_path, mode & 0o7777)
+                os.replace(tmp_path, path)
+                self.stats["shebangs"] += 1
+        
+        if make_executable or first_line.startswith(b"#!"):
+            wanted = mode | ((mode & 0o444) >> 2)
+            if wanted != mode:
+                os.chmod(path, wanted & 0o7777)
+                self.stats["modes"] += 1
+    
+    def fix_tree(self, root: str, make_executable: bool = False) -> Dict[str, int]:
+        """Walk root with os.scandir; every regular file gets the exec bit if make_executable"""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            if os.path.lexists(os.path.join(directory, ".git")):
+                # Tracked files must stay clean for git fetch/reset in update_git_tools
+                self.stats["repos"] += 1
+                continue
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_symlink():
+                            continue
+                        if entry.is_dir():
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            self.stats["scanned"] += 1
+                            self.fix_file(entry.path, entry.stat().st_mode, make_executable)
+                    except OSError as e:
+                        self.stats["errors"] += 1
+                        logger.error(f"Error fixing {entry.path}: {e}")
+        return self.stats
+
+
+def version_key(version: str) -> Tuple:
+    """Sortable key for release versions like 2.31.0 or 1!2.0.post1"""
+    # Local labels (+cpu, +ubuntu1) say nothing about the release
+    version = version.split("+", 1)[0]
+    epoch, _, release = version.partition("!") if "!" in version else ("0", "", version)
+    numbers = re.match(r"[\d.]*\d", release)
+    parts = tuple(int(n) for n in numbers.group(0).split(".")) if numbers else ()
+    # Trailing zeros do not change a release (1.0 == 1.0.0)
+    while parts and parts[-1] == 0:
+        parts = parts[:-1]
+    post = re.search(r"post(\d+)", release)
+    return (int(epoch) if epoch.isdigit() else 0, parts, 0 if is_prerelease(release) else 1,
+            int(post.group(1)) if post else -1)
+
+
+def is_prerelease(version: str) -> bool:
+    # Anchored on the release number, so local labels and stray letters do not count
+    release = version.lower().split("+", 1)[0]
+    return bool(re.search(r"\d[-_.]?(?:a|b|c|rc|alpha|beta|pre|preview)\d*|\.?dev\d*", release))
+
+
+def python_satisfies(spec: str, python_version: Optional[Tuple[int, ...]] = None) -> bool:
+    """Evaluate a Requires-Python specifier like '>=3.8, !=3.9.*' for this interpreter"""
+    current = tuple(python_version or sys.version_info[:3])
+    for clause in spec.split(","):
+        match = re.match(r"^\s*(~=|===|==|!=|<=|>=|<|>)\s*([\d.]+)(\.\*)?\s*$", clause)
+        if not match:
+            # Unknown syntax: let pip decide
+            continue
+        operator, version, wildcard = match.groups()
+        wanted = tuple(int(n) for n in version.strip(".").split("."))
+        if wildcard or operator == "~=":
+            prefix = wanted if wildcard else wanted[:-1]
+            matches = current[:len(prefix)] == prefix
+            if operator == "!=" and matches:
+                return False
+            if operator in ("==", "===") and not matches:
+                return False
+            if operator == "~=" and not (matches and current >= wanted):
+                return False
+            continue
+        # Compare at the specifier's precision padded with zeros, as 3.8 == 3.8.0
+        padded = current + (0,) * max(len(wanted) - len(current), 0)
+        size = max(len(wanted), 3)
+        left, right = padded[:size], wanted + (0,) * (size - len(wanted))
+        ok = {"==": left == right, "===": left == right, "!=": left != right, "<=": left <= right,
+              ">=": left >= right, "<": left < right, ">": left > right}[operator]
+        if not ok:
+            return False
+    return True
+
+
+class PipIndex:
+    """Look up the newest release of projects on a PEP 503 simple index or a local directory"""
+    
+    FILE_VERSION = re.compile(r"^(?P<name>.+?)-(?P<version>\d[^-]*?)(?:-[^-]+-[^-]+-[^-]+\.whl|\.tar\.gz|\.zip|\.tar\.bz2)$")
+    LINK = re.compile(r"<a\s([^>]*)>([^<]+)</a>", re.IGNORECASE)
+    ATTRIBUTE = re.compile(r"""([\w-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+    
+    def __init__(self, index: str = "https://pypi.org/simple", timeout: float = 15.0, max_workers: int = 8):
+        self.index = index.rstrip("/")
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.failed: List[str] = []
+    
+    @property
+    def is_local(self) -> bool:
+        return "://" not in self.index or self.index.startswith("file://")
+    
+    @property
+    def url(self) -> str:
+        """Index location in the form pip's --index-url expects"""
+        if self.index.startswith("file://") or not self.is_local:
+            return self.index
+        return "file://" + os.path.abspath(self.index)
+    
+    def parse_links(self, page: str) -> List[Tuple[str, Dict[str, str]]]:
+        import html
+        
+        links = []
+        for attributes, text in self.LINK.findall(page):
+            fields = {}
+            for key, double, single, bare in self.ATTRIBUTE.findall(attributes):
+                fields[key.lower()] = html.unescape(double or single or bare)
+            links.append((html.unescape(text), fields))
+        return links
+    
+    def links(self, name: str) -> List[Tuple[str, Dict[str, str]]]:
+        """Distribution file names listed for a project, with their anchor attributes"""
+        project = normalize_module_name(name)
+        if self.is_local:
+            directory = os.path.join(self.index[len("file://"):] if self.index.startswith("file://") else self.index, project)
+            page = os.path.join(directory, "index.html")
+            if os.path.exists(page):
+                with open(page, "r", encoding="utf-8", errors="replace") as f:
+                    return self.parse_links(f.read())
+            return [(filename, {}) for filename in os.listdir(directory)] if os.path.isdir(directory) else []
+        
+        import urllib.request
+        
+        with urllib.request.urlopen(f"{self.index}/{project}/", timeout=self.timeout) as response:
+            return self.parse_links(response.read().decode("utf-8", errors="replace"))
+    
+    def latest(self, name: str) -> Optional[str]:
+        """Newest final release that is not yanked and supports this Python"""
+        versions = set()
+        for filename, attributes in self.links(name):
+            if "data-yanked" in attributes:
+                continue
+            if not python_satisfies(attributes.get("data-requires-python", "")):
+                continue
+            match = self.FILE_VERSION.match(filename.strip())
+            if match and normalize_module_name(match.group("name")) == normalize_module_name(name):
+                version = match.group("version")
+                if not is_prerelease(version):
+                    versions.add(version)
+        return max(versions, key=version_key) if versions else None
+    
+    def outdated(self, installed: Dict[str, str], names: List[str]) -> Dict[str, Tuple[str, str]]:
+        """Map each outdated project to (installed, latest), querying the index concurrently"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        candidates = [name for name in names if normalize_module_name(name) in installed]
+        self.failed = []
+        
+        def check(name: str):
+            try:
+                return name, self.latest(name)
+            except Exception as e:
+                logger.error(f"Error checking {name} on {self.index}: {e}")
+                self.failed.append(name)
+                return name, None
+        
+        result = {}
+        if not candidates:
+            return result
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(candidates))) as executor:
+            for name, latest in executor.map(check, candidates):
+                current = installed[normalize_module_name(name)]
+                if latest and version_key(latest) > version_key(current):
+                    result[name] = (current, latest)
+        return result
+
+
+def read_git_head(repo: str) -> Tuple[Optional[str], Optional[str]]:
+    """(branch, commit) of a work tree, read straight from .git without running git"""
+    git_dir = os.path.join(repo, ".git")
     try:
-        __import__(module)
-    except ImportError:
-        missing_modules.append(module)
+        with open(os.path.join(git_dir, "HEAD")) as f:
+            head = f.read().strip()
+    except OSError:
+        return None, None
+    if not head.startswith("ref: "):
+        return None, head
+    
+    ref = head[len("ref: "):]
+    branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+    try:
+        with open(os.path.join(git_dir, ref)) as f:
+            return branch, f.read().strip()
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(git_dir, "packed-refs")) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) == 2 and fields[1] == ref:
+                    return branch, fields[0]
+    except OSError:
+        pass
+    return branch, None
+
+
+def parse_ls_remote(output: str) -> Optional[str]:
+    """Commit hash from `git ls-remote` output, ignoring warnings git mixes into it"""
+    match = re.search(r"^([0-9a-f]{40,64})\s", output, re.MULTILINE)
+    return match.group(1) if match else None
+
+
+def read_git_remote_url(repo: str, remote: str = "origin") -> Optional[str]:
+    try:
+        with open(os.path.join(repo, ".git", "config")) as f:
+            section = None
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    section = line
+                elif section == f'[remote "{remote}"]' and line.startswith("url"):
+                    return line.split("=", 1)[1].strip()
+    except OSError:
+        pass
+    return None
+
+
+class ToolRegistry:
+    """Git-based tools under ~/tools, stored in ~/.blackmumba/tools.json"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.tools: Dict[str, Dict] = {}
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self.tools = json.load(f)
+        except FileNotFoundError:
+            self.tools = {}
+        except Exception as e:
+            logger.error(f"Error reading tool registry: {e}")
+            self.tools = {}
+        return self
+    
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.tools, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+    
+    def register(self, name: str, url: str, path: str, shallow: bool = True):
+        entry = self.tools.setdefault(name, {"last_gc": 0})
+        entry.update({"url": url, "path": path, "shallow": shallow})
+    
+    def discover(self, tools_dir: str) -> List[str]:
+        """Register git work trees found directly under tools_dir"""
+        found = []
+        known = {entry["path"] for entry in self.tools.values()}
+        if not os.path.isdir(tools_dir):
+            return found
+        with os.scandir(tools_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and entry.path not in known and os.path.isdir(os.path.join(entry.path, ".git")):
+                    url = read_git_remote_url(entry.path)
+                    if url:
+                        shallow = os.path.exists(os.path.join(entry.path, ".git", "shallow"))
+                        self.register(entry.name, url, entry.path, shallow)
+                        found.append(entry.name)
+        return found
+
+
+class SpaceScanner:
+    """Multi-threaded os.scandir walk that totals reclaimable bytes by category"""
+    
+    CATEGORIES = {
+        "pip-cache": "pip download/wheel cache",
+        "pycache": "__pycache__ directories",
+        "git-objects": "git object stores under tools",
+        "apt-lists": "stale apt lists",
+        "debs": "orphaned .deb archives",
+    }
+    
+    def __init__(self, roots: List[str], prefix: str, home_dir: str, tools_dir: str,
+                 installed: Optional[Dict[str, str]] = None, max_workers: int = 8, max_paths: int = 10000):
+        self.roots = [root for root in roots if os.path.isdir(root)]
+        self.pip_cache = os.path.join(home_dir, ".cache", "pip")
+        self.apt_lists = os.path.join(prefix, "var", "lib", "apt", "lists")
+        self.apt_archives = os.path.join(prefix, "var", "cache", "apt", "archives")
+        self.sources_list = os.path.join(prefix, "etc", "apt", "sources.list")
+        self.tools_dir = tools_dir
+        # {package: version} from dpkg; archives matching it are kept for reinstalls and bundles
+        self.installed = installed
+        self.max_workers = max_workers
+        self.max_paths = max_paths
+        self.lock = threading.Lock()
+        self.totals = {name: 0 for name in list(self.CATEGORIES) + ["other"]}
+        self.counts = {name: 0 for name in self.totals}
+        # Paths are remembered only for categories whose removal needs them, and only up to max_paths
+        self.paths: Dict[str, List[str]] = {"pycache": [], "apt-lists": [], "git-objects": [], "debs": []}
+        self.list_prefixes = self.current_list_prefixes()
+    
+    def current_list_prefixes(self) -> List[str]:
+        """apt list file name prefixes for the sources currently configured"""
+        prefixes = []
+        sources = [self.sources_list] + glob.glob(os.path.join(os.path.dirname(self.sources_list), "sources.list.d", "*.list"))
+        for path in sources:
+            try:
+                with open(path) as f:
+                    for line in f:
+                        fields = line.split()
+                        if not fields or fields[0] != "deb":
+                            continue
+                        fields = fields[1:]
+                        # Skip an options block such as [trusted=yes] or [ arch=arm64 signed-by=... ]
+                        if fields and fields[0].startswith("["):
+                            while fields and not fields[0].endswith("]"):
+                                fields = fields[1:]
+                            fields = fields[1:]
+                        if fields:
+                            uri = re.sub(r"^\w+://", "", fields[0]).rstrip("/")
+                            prefixes.append(uri.replace("/", "_"))
+            except OSError:
+                continue
+        return prefixes
+    
+    def directory_category(self, path: str, name: str) -> Optional[str]:
+        if name == "__pycache__":
+            return "pycache"
+        if path == self.pip_cache:
+            return "pip-cache"
+        if name == "objects" and os.path.basename(os.path.dirname(path)) == ".git" and path.startswith(self.tools_dir + os.sep):
+            return "git-objects"
+        return None
+    
+    def is_orphaned_deb(self, name: str) -> bool:
+        """An archive whose package is not installed at exactly that version"""
+        if self.installed is None:
+            return False
+        from urllib.parse import unquote
+        
+        parts = name[:-len(".deb")].split("_")
+        if len(parts) != 3:
+            return False
+        return self.installed.get(parts[0]) != unquote(parts[1])
+    
+    def file_category(self, directory: str, name: str) -> Optional[str]:
+        if directory == self.apt_archives and name.endswith(".deb") and self.is_orphaned_deb(name):
+            return "debs"
+        # Without any parsed source every list would look stale, so flag none
+        if (directory == self.apt_lists and self.list_prefixes and name != "lock"
+                and not any(name.startswith(p) for p in self.list_prefixes)):
+            return "apt-lists"
+        return None
+    
+    def remember(self, category: str, path: str):
+        paths = self.paths.get(category)
+        if paths is not None and len(paths) < self.max_paths:
+            paths.append(path)
+    
+    def scan_directory(self, directory: str, category: Optional[str], pending) -> None:
+        sizes: Dict[str, int] = {}
+        files: Dict[str, int] = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            child = category or self.directory_category(entry.path, entry.name)
+                            if child and not category:
+                                with self.lock:
+                                    self.remember(child, entry.path)
+                            pending.put((entry.path, child))
+                        else:
+                            size = entry.stat(follow_symlinks=False).st_size
+                            file_category = category or self.file_category(directory, entry.name) or "other"
+                            sizes[file_category] = sizes.get(file_category, 0) + size
+                            files[file_category] = files.get(file_category, 0) + 1
+                            if file_category in ("apt-lists", "debs"):
+                                with self.lock:
+                                    self.remember(file_category, entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            return
+        with self.lock:
+            for key, size in sizes.items():
+                self.totals[key] += size
+                self.counts[key] += files[key]
+    
+    def scan(self) -> Dict[str, int]:
+        """Walk all roots; only the directory frontier is held in memory"""
+        import queue
+        
+        pending = queue.Queue()
+        seen = set()
+        for root in self.roots:
+            real = os.path.realpath(root)
+            if real not in seen:
+                seen.add(real)
+                pending.put((root, self.directory_category(root, os.path.basename(root))))
+        
+        def worker():
+            while True:
+                item = pending.get()
+                try:
+                    if item is None:
+                        return
+                    self.scan_directory(item[0], item[1], pending)
+                finally:
+                    pending.task_done()
+        
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.max_workers)]
+        for thread in threads:
+            thread.start()
+        pending.join()
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+        return self.totals
+    
+    def git_repositories(self) -> List[str]:
+        return [os.path.dirname(os.path.dirname(path)) for path in self.paths["git-objects"]]
+
+
+class WordlistStore:
+    """Sorted, deduplicated wordlists with a sparse offset index for mmap lookups
+    
+    Each list is a plain sorted text file (usable as-is by hydra, sqlmap, ...)
+    plus a .idx file holding the byte offset of every stride-th line.
+    """
+    
+    MAGIC = b"BMWIDX1\0"
+    HEADER = "<8sIQ"
+    
+    def __init__(self, directory: str, memory_limit: int = 64 * 1024 * 1024, stride: int = 1024, fan_in: int = 64):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.stride = stride
+        self.fan_in = fan_in
+    
+    def paths(self, name: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, name)
+        return f"{base}.txt", f"{base}.idx"
+    
+    @staticmethod
+    def open_source(path: str):
+        """Open plain, gzip or xz lists as a binary stream"""
+        if path.endswith(".gz"):
+            import gzip
+            return gzip.open(path, "rb")
+        if path.endswith((".xz", ".lzma")):
+            import lzma
+            return lzma.open(path, "rb")
+        return open(path, "rb")
+    
+    def write_run(self, words: List[bytes], tmp_dir: str) -> str:
+        import tempfile
+        
+        words.sort()
+        fd, path = tempfile.mkstemp(prefix="run-", dir=tmp_dir)
+        with os.fdopen(fd, "wb") as f:
+            previous = None
+            for word in words:
+                if word != previous:
+                    f.write(word + b"\n")
+                    previous = word
+        return path
+    
+    @staticmethod
+    def read_run(path: str):
+        with open(path, "rb") as f:
+            for line in f:
+                yield line.rstrip(b"\n")
+    
+    def merge_runs(self, runs: List[str], tmp_dir: str) -> str:
+        """Merge sorted runs fan_in at a time until one remains"""
+        import heapq
+        import tempfile
+        
+        while len(runs) > 1:
+            merged = []
+            for i in range(0, len(runs), self.fan_in):
+                group = runs[i:i + self.fan_in]
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                fd, path = tempfile.mkstemp(prefix="run-", dir=tmp_dir)
+                with os.fdopen(fd, "wb") as out:
+                    previous = None
+                    for word in heapq.merge(*(self.read_run(run) for run in group)):
+                        if word != previous:
+                            out.write(word + b"\n")
+                            previous = word
+                for run in group:
+                    if run.startswith(tmp_dir):
+                        os.remove(run)
+                merged.append(path)
+            runs = merged
+        return runs[0]
+    
+    def import_lists(self, name: str, sources: List[str]) -> Dict[str, int]:
+        """Stream sources into sorted runs, then merge them (and any existing list) in fixed memory"""
+        import tempfile
+        
+        os.makedirs(self.directory, exist_ok=True)
+        data_path, index_path = self.paths(name)
+        tmp_dir = tempfile.mkdtemp(prefix=".import-", dir=self.directory)
+        stats = {"read": 0, "unique": 0}
+        
+        try:
+            runs = []
+            words: List[bytes] = []
+            used = 0
+            for source in sources:
+                with self.open_source(source) as stream:
+                    for line in stream:
+                        word = line.rstrip(b"\r\n")
+                        if not word:
+                            continue
+                        stats["read"] += 1
+                        words.append(word)
+                        # Rough per-item cost of a bytes object in a list
+                        used += len(word) + 41
+                        if used >= self.memory_limit:
+                            runs.append(self.write_run(words, tmp_dir))
+                            words = []
+                            used = 0
+            if words:
+                runs.append(self.write_run(words, tmp_dir))
+            if os.path.exists(data_path):
+                runs.append(data_path)
+            
+            if not runs:
+                return stats
+            merged = self.merge_runs(runs, tmp_dir)
+            stats["unique"] = self.write_index(merged, f"{index_path}.tmp")
+            if merged == data_path:
+                os.replace(f"{index_path}.tmp", index_path)
+            else:
+                os.replace(merged, data_path)
+                os.replace(f"{index_path}.tmp", index_path)
+            return stats
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    def write_index(self, data_path: str, index_path: str) -> int:
+        """Record the offset of every stride-th line; returns the line count"""
+        import array
+        import struct
+        
+        offsets = array.array("Q")
+        count = 0
+        position = 0
+        with open(data_path, "rb") as f:
+            for line in f:
+                if count % self.stride == 0:
+                    offsets.append(position)
+                position += len(line)
+                count += 1
+        with open(index_path, "wb") as f:
+            f.write(struct.pack(self.HEADER, self.MAGIC, self.stride, count))
+            offsets.tofile(f)
+        return count
+    
+    def open_list(self, name: str):
+        """Return (mmap, sparse offsets, stride, count) for a stored list"""
+        import array
+        import mmap
+        import struct
+        
+        data_path, index_path = self.paths(name)
+        with open(index_path, "rb") as f:
+            magic, stride, count = struct.unpack(self.HEADER, f.read(struct.calcsize(self.HEADER)))
+            if magic != self.MAGIC:
+                raise ValueError(f"Not a wordlist index: {index_path}")
+            offsets = array.array("Q")
+            offsets.frombytes(f.read())
+        with open(data_path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if count else b""
+        return data, offsets, stride, count
+    
+    @staticmethod
+    def line_at(data, offset: int) -> Tuple[bytes, int]:
+        end = data.find(b"\n", offset)
+        if end == -1:
+            end = len(data)
+        return data[offset:end], end + 1
+    
+    def seek(self, data, offsets, word: bytes) -> int:
+        """Offset of the first line >= word"""
+        low, high = 0, len(offsets)
+        while low < high:
+            middle = (low + high) // 2
+            if self.line_at(data, offsets[middle])[0] <= word:
+                low = middle + 1
+            else:
+                high = middle
+        position = offsets[low - 1] if low else 0
+        while position < len(data):
+            line, following = self.line_at(data, position)
+            if line >= word:
+                return position
+            position = following
+        return len(data)
+    
+    def contains(self, name: str, word: str) -> bool:
+        data, offsets, _, count = self.open_list(name)
+        if not count:
+            return False
+        key = word.encode()
+        position = self.seek(data, offsets, key)
+        return position < len(data) and self.line_at(data, position)[0] == key
+    
+    def slice(self, name: str, start: int, stop: int) -> List[str]:
+        """Lines start..stop-1 by position, jumping via the sparse index"""
+        data, offsets, stride, count = self.open_list(name)
+        start, stop = max(start, 0), min(stop, count)
+        result = []
+        if start >= stop:
+            return result
+        position = offsets[start // stride]
+        for _ in range(start % stride):
+            position = self.line_at(data, position)[1]
+        for _ in range(stop - start):
+            line, position = self.line_at(data, position)
+            result.append(line.decode(errors="replace"))
+        return result
+    
+    def range(self, name: str, low: str, high: str, limit: int = 1000) -> List[str]:
+        """Words w with low <= w < high, e.g. everything starting with a prefix"""
+        data, offsets, _, count = self.open_list(name)
+        result = []
+        if not count:
+            return result
+        position = self.seek(data, offsets, low.encode())
+        high_key = high.encode()
+        while position < len(data) and len(result) < limit:
+            line, position = self.line_at(data, position)
+            if line >= high_key:
+                break
+            result.append(line.decode(errors="replace"))
+        return result
+    
+    def list_names(self) -> Dict[str, int]:
+        import struct
+        
+        names = {}
+        for index_path in sorted(glob.glob(os.path.join(self.directory, "*.idx"))):
+            try:
+                with open(index_path, "rb") as f:
+                    magic, _, count = struct.unpack(self.HEADER, f.read(struct.calcsize(self.HEADER)))
+                if magic == self.MAGIC:
+                    names[os.path.basename(index_path)[:-4]] = count
+            except (OSError, struct.error):
+                continue
+        return names
+
+
+def command_packages(command: List[str]) -> List[str]:
+    """Package names an install command operates on"""
+    if len(command) > 2 and command[1] == "install" and os.path.basename(command[0]) in ("pkg", "apt", "apt-get", "pip"):
+        return [arg for arg in command[2:] if not arg.startswith("-")]
+    return []
+
+
+def children_cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RunTrace:
+    """Timing records for commands and steps, exportable as JSONL or Chrome trace"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.events: List[Dict] = []
+        self.origin = time.monotonic()
+        self.started = time.time()
+    
+    def record(self, kind: str, name: str, start: float, end: float, **fields):
+        """Store one event; start and end are time.monotonic() values"""
+        event = {
+            "kind": kind,
+            "name": name,
+            "ts": self.started + (start - self.origin),
+            "start": start - self.origin,
+            "duration": end - start,
+            "thread": threading.get_ident(),
+        }
+        event.update(fields)
+        with self.lock:
+            self.events.append(event)
+    
+    def slowest(self, count: int = 10, kind: str = "command") -> List[Dict]:
+        with self.lock:
+            events = [event for event in self.events if event["kind"] == kind]
+        return sorted(events, key=lambda e: e["duration"], reverse=True)[:count]
+    
+    def export_jsonl(self, path: Optional[str] = None) -> str:
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.lock:
+            events = list(self.events)
+        with open(path, "w") as f:
+            for event in events:
+                f.write(json.dumps(event, sort_keys=True) + "\n")
+        return path
+    
+    def export_chrome(self, path: str) -> str:
+        """Write the Trace Event Format understood by chrome://tracing and Perfetto"""
+        with self.lock:
+            events = list(self.events)
+        trace_events = []
+        for event in events:
+            args = {k: v for k, v in event.items() if k not in ("kind", "name", "ts", "start", "duration", "thread")}
+            trace_events.append({
+                "name": event["name"],
+                "cat": event["kind"],
+                "ph": "X",
+                "ts": int(event["start"] * 1e6),
+                "dur": int(event["duration"] * 1e6),
+                "pid": os.getpid(),
+                "tid": event["thread"],
+                "args": args
+            })
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+class CommandEngine:
+    """Run external commands concurrently under per-resource limits"""
+    
+    def __init__(self, limits: Optional[Dict[str, int]] = None, tail_lines: int = 50,
+                 trace: Optional[RunTrace] = None):
+        # Only one process may hold the dpkg lock; pip and git can overlap
+        self.limits = {"dpkg": 1, "pip": 2, "git": 4, "default": 4}
+        self.limits.update(limits or {})
+        self.tail_lines = tail_lines
+        self.trace = trace
+        # Thread semaphores rather than asyncio ones: every run_all gets its own event loop, and
+        # concurrent run_all calls from different threads must still share the same slots
+        self.slots = {name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()}
+    
+    @staticmethod
+    def classify(command: List[str]) -> str:
+        """Work out which shared resource a command contends for"""
+        program = os.path.basename(command[0]) if command else ""
+        if program in ("pkg", "apt", "apt-get", "dpkg"):
+            return "dpkg"
+        if program.startswith("pip") or (program.startswith("python") and command[1:3] == ["-m", "pip"]):
+            return "pip"
+        if program == "git":
+            return "git"
+        return "default"
+    
+    async def acquire(self, resource: str) -> threading.BoundedSemaphore:
+        """Wait for a slot without blocking the event loop, so the wait stays cancellable"""
+        import asyncio
+        
+        slot = self.slots.get(resource, self.slots["default"])
+        while not slot.acquire(blocking=False):
+            await asyncio.sleep(0.05)
+        return slot
+    
+    async def run_one(self, command: List[str]) -> subprocess.CompletedProcess:
+        """Run a command once a slot for its resource is free"""
+        import asyncio
+        
+        slot = await self.acquire(self.classify(command))
+        try:
+            tail = deque(maxlen=self.tail_lines)
+            output_bytes = 0
+            start = time.monotonic()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    # Own process group, so terminate() also reaches the command's children
+                    start_new_session=True
+                )
+            except OSError as e:
+                returncode = 127
+                tail.append(str(e))
+            else:
+                try:
+                    while True:
+                        line = await process.stdout.readline()
+                        if not line:
+                            break
+                        output_bytes += len(line)
+                        tail.append(line.decode(errors="replace").rstrip("\n"))
+                    returncode = await process.wait()
+                except asyncio.CancelledError:
+                    await self.terminate(process)
+                    raise
+            
+            if self.trace:
+                # Children overlap here, so their CPU time cannot be told apart
+                self.trace.record("command", " ".join(command), start, time.monotonic(),
+                                  exit_code=returncode, output_bytes=output_bytes, cpu_time=None,
+                                  packages=command_packages(command), resource=self.classify(command))
+            return subprocess.CompletedProcess(command, returncode, "\n".join(tail), None)
+        finally:
+            slot.release()
+    
+    @staticmethod
+    async def terminate(process, grace: float = 3.0):
+        """Stop a child's process group, escalating to SIGKILL if it ignores SIGTERM"""
+        import asyncio
+        import signal
+        
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), timeout=grace)
+        except asyncio.TimeoutError:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+        except ProcessLookupError:
+            pass
+    
+    async def gather(self, commands: List[List[str]]) -> List[subprocess.CompletedProcess]:
+        import asyncio
+        
+        tasks = [asyncio.ensure_future(self.run_one(command)) for command in commands]
+        try:
+            return await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            # gather has cancelled the tasks; let each one reap its child before the loop closes
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    
+    def run_all(self, commands: List[List[str]]) -> List[subprocess.CompletedProcess]:
+        """Run commands to completion; Ctrl-C cancels and reaps every child"""
+        if not commands:
+            return []
+        import asyncio
+        
+        return asyncio.run(self.gather(commands))
+
+
+# Built-in profile; files in profiles/ or ~/.blackmumba/profiles can extend or replace it
+DEFAULT_PROFILE = {
+    "name": "default",
+    "description": "Core tools, security tools, Python modules and 50+ utilities",
+    "core": [
+        "python", "python-pip", "git", "curl", "wget",
+        "nano", "vim", "unzip", "zip", "tar", "clang",
+        "make", "cmake"
+    ],
+    "security": [
+        "nmap", "hydra", "nikto"
+    ],
+    "python": [
+        "requests", "rich", "colorama", "tqdm",
+        "scapy", "beautifulsoup4", "lxml", "pillow",
+        "pycryptodome", "paramiko", "netifaces"
+    ],
+    "extra": [
+        # System monitoring
+        "htop", "neofetch", "tree", "ncdu", "duf",
+        # Shell enhancements
+        "bash-completion", "command-not-found",
+        # Text processing
+        "jq", "ripgrep", "fd", "bat", "exa",
+        # Networking
+        "netcat-openbsd", "socat", "tcpdump", "traceroute", "mtr", "whois", "dnsutils",
+        # File transfer
+        "rsync", "rclone", "aria2", "lftp",
+        # Development
+        "nodejs", "npm", "yarn", "golang", "rust", "php", "perl", "ruby", "openjdk-17",
+        # Version control
+        "subversion", "mercurial",
+        # Terminal multiplexers & file managers
+        "tmux", "screen", "ranger", "mc",
+        # Documentation
+        "man", "tldr",
+        # Media
+        "ffmpeg", "imagemagick", "yt-dlp",
+        # Security/privacy tools
+        "proxychains-ng", "tor"
+    ],
+    "sqlmap": True
+}
+
+PROFILE_SECTIONS = ("core", "security", "python", "extra")
+PROFILE_DIRS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"),
+    os.path.join(os.path.expanduser("~"), ".blackmumba", "profiles")
+]
+
+SQLMAP_REPO = "https://github.com/sqlmapproject/sqlmap.git"
+
+TERMUX_MIRRORS = [
+    "https://packages-cf.termux.dev/apt/termux-main",
+    "https://packages.termux.dev/apt/termux-main",
+    "https://mirror.grimler.se/termux/termux-main",
+    "https://mirror.mwt.me/termux/main",
+    "https://mirrors.tuna.tsinghua.edu.cn/termux/apt/termux-main",
+    "https://mirrors.ustc.edu.cn/termux/apt/termux-main",
+    "https://mirrors.bfsu.edu.cn/termux/apt/termux-main",
+]
+
+
+class MirrorBenchmark:
+    """Probe package mirrors concurrently and rank them by speed"""
+    
+    def __init__(self, candidates: List[str], index_path: str = "dists/stable/Release",
+                 timeout: float = 10.0, max_workers: int = 8):
+        self.candidates = candidates
+        self.index_path = index_path
+        self.timeout = timeout
+        self.max_workers = max_workers
+    
+    def probe(self, base_url: str) -> Dict:
+        """Fetch the index file from one mirror, timing first byte and throughput"""
+        import urllib.request
+        
+        url = f"{base_url.rstrip('/')}/{self.index_path}"
+        result = {"url": base_url, "ttfb": None, "elapsed": None, "bytes": 0, "throughput": 0.0, "error": ""}
+        start = time.monotonic()
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                first = response.read(1)
+                result["ttfb"] = time.monotonic() - start
+                size = len(first)
+                while True:
+                    chunk = response.read(65536)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+            result["elapsed"] = time.monotonic() - start
+            result["bytes"] = size
+            transfer = max(result["elapsed"] - result["ttfb"], 1e-6)
+            result["throughput"] = size / transfer
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+    
+    def run(self) -> List[Dict]:
+        """Probe all candidates and return them fastest first, failures last"""
+        if not self.candidates:
+            return []
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.candidates))) as executor:
+            results = list(executor.map(self.probe, self.candidates))
+        return sorted(results, key=lambda r: (bool(r["error"]), r["elapsed"] or 0, -r["throughput"]))
+    
+    @staticmethod
+    def write_sources(sources_file: str, base_url: str, suite: str = "stable main") -> bool:
+        """Point the main apt source at base_url, keeping a backup; returns True if changed"""
+        lines = []
+        if os.path.exists(sources_file):
+            with open(sources_file, "r") as f:
+                lines = f.read().splitlines()
+        
+        new_line = f"deb {base_url} {suite}"
+        updated = []
+        replaced = False
+        for line in lines:
+            fields = line.split()
+            if not replaced and len(fields) >= 3 and fields[0] == "deb" and not line.lstrip().startswith("#"):
+                updated.append(new_line)
+                replaced = True
+            else:
+                updated.append(line)
+        if not replaced:
+            updated.append(new_line)
+        
+        if updated == lines:
+            return False
+        
+        os.makedirs(os.path.dirname(sources_file), exist_ok=True)
+        if os.path.exists(sources_file):
+            shutil.copy2(sources_file, f"{sources_file}.bak")
+        tmp_path = f"{sources_file}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(updated) + "\n")
+        os.replace(tmp_path, sources_file)
+        return True
+
+
+class InstalledIndex:
+    """Snapshot of installed dpkg packages and pip distributions"""
+    
+    def __init__(self, prefix: str):
+        self.status_file = os.path.join(prefix, "var", "lib", "dpkg", "status")
+        self.packages: Dict[str, str] = {}
+        self.modules: Dict[str, str] = {}
+    
+    def load(self):
+        """Read the dpkg status database and pip metadata once"""
+        self.packages = self.read_dpkg_status(self.status_file)
+        self.modules = self.read_pip_metadata()
+        return self
+    
+    @staticmethod
+    def read_dpkg_status(status_file: str) -> Dict[str, str]:
+        """Parse dpkg status stanzas into {package: version} for installed packages"""
+        packages: Dict[str, str] = {}
+        if not os.path.exists(status_file):
+            return packages
+        
+        fields: Dict[str, str] = {}
+        with open(status_file, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line:
+                    InstalledIndex._add_stanza(fields, packages)
+                    fields = {}
+                elif not line[0].isspace() and ":" in line:
+                    key, _, value = line.partition(":")
+                    fields[key] = value.strip()
+        InstalledIndex._add_stanza(fields, packages)
+        return packages
+    
+    @staticmethod
+    def _add_stanza(fields: Dict[str, str], packages: Dict[str, str]):
+        name = fields.get("Package")
+        if name and fields.get("Status", "").endswith(" installed"):
+            packages[name] = fields.get("Version", "")
+    
+    @staticmethod
+    def read_pip_metadata() -> Dict[str, str]:
+        """Read installed distributions via importlib.metadata"""
+        modules: Dict[str, str] = {}
+        try:
+            from importlib import metadata
+            for dist in metadata.distributions():
+                name = dist.metadata.get("Name")
+                if name:
+                    modules[normalize_module_name(name)] = dist.version
+        except Exception as e:
+            logger.error(f"Error reading pip metadata: {e}")
+        return modules
+    
+    def is_installed(self, name: str, pkg_manager: str = "pkg") -> bool:
+        if pkg_manager == "pip":
+            return normalize_module_name(name) in self.modules
+        return name in self.packages
+    
+    def missing(self, names: List[str], pkg_manager: str = "pkg") -> List[str]:
+        """Return the names that are not installed yet"""
+        return [name for name in names if not self.is_installed(name, pkg_manager)]
+    
+    def mark_installed(self, name: str, pkg_manager: str = "pkg", version: str = ""):
+        if pkg_manager == "pip":
+            self.modules[normalize_module_name(name)] = version
+        else:
+            self.packages[name] = version
+
+
+def load_profile(name: str, search_dirs: Optional[List[str]] = None, _seen: Optional[List[str]] = None) -> Dict:
+    """Load a TOML/JSON profile by path or name, applying "extends" on top of its base"""
+    search_dirs = PROFILE_DIRS if search_dirs is None else search_dirs
+    seen = (_seen or []) + [name]
+    
+    path = name if os.path.isfile(name) else None
+    if path is None:
+        # Later directories (the user's) take precedence over the bundled ones
+        for directory in reversed(search_dirs):
+            for extension in (".toml", ".json"):
+                candidate = os.path.join(directory, name + extension)
+                if os.path.isfile(candidate):
+                    path = candidate
+                    break
+            if path:
+                break
+    if path is None:
+        if name == "default":
+            return json.loads(json.dumps(DEFAULT_PROFILE))
+        raise ValueError(f"Profile not found: {name}")
+    
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError(f"{path}: TOML profiles need Python 3.11+, use JSON instead")
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, "r") as f:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: profile must be a table/object")
+    
+    base = data.get("extends")
+    if base:
+        if base in seen:
+            raise ValueError(f"{path}: circular extends via {base}")
+        profile = load_profile(base, search_dirs, seen)
+    else:
+        profile = {section: [] for section in PROFILE_SECTIONS}
+        profile["sqlmap"] = False
+    
+    for section in PROFILE_SECTIONS:
+        if section in data:
+            items = data[section]
+            if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+                raise ValueError(f"{path}: '{section}' must be a list of package names")
+            profile[section] = list(items)
+        extra = data.get(f"add_{section}", [])
+        profile[section] = profile[section] + [item for item in extra if item not in profile[section]]
+    profile["sqlmap"] = bool(data.get("sqlmap", profile.get("sqlmap", False)))
+    profile["name"] = data.get("name", os.path.splitext(os.path.basename(path))[0])
+    profile["description"] = data.get("description", profile.get("description", ""))
+    return profile
+
+
+def parse_depends(value: str) -> List[str]:
+    """Package names from a Depends field, taking the first of any alternatives"""
+    names = []
+    for clause in value.split(","):
+        name = clause.split("|", 1)[0].strip().split(" ", 1)[0].split("(", 1)[0].split(":", 1)[0]
+        if name:
+            names.append(name)
+    return names
+
+
+class PackageCatalog:
+    """Searchable index of apt Packages lists, cached until the lists change"""
+    
+    VERSION = 1
+    
+    def __init__(self, prefix: str, cache_path: str):
+        self.lists_dir = os.path.join(prefix, "var", "lib", "apt", "lists")
+        self.cache_path = cache_path
+        # name -> [version, description, size, installed_size, depends, provides]
+        self.packages: Dict[str, list] = {}
+        self.provides: Dict[str, str] = {}
+        self.rebuilt = False
+    
+    def list_files(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.lists_dir, "*_Packages")))
+    
+    def signature(self) -> List[list]:
+        signature = []
+        for path in self.list_files():
+            stat = os.stat(path)
+            signature.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+        return signature
+    
+    def load(self):
+        """Use the cached index when list mtimes match, otherwise reparse"""
+        signature = self.signature()
+        try:
+            with open(self.cache_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("version") == self.VERSION and cached.get("signature") == signature:
+                self.packages = cached["packages"]
+                self.index_provides()
+                return self
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error reading package catalog {self.cache_path}: {e}")
+        
+        self.packages = {}
+        for path in self.list_files():
+            self.parse_list(path)
+        self.index_provides()
+        self.rebuilt = True
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.VERSION, "signature": signature, "packages": self.packages},
+                          f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.error(f"Error writing package catalog: {e}")
+        return self
+    
+    def parse_list(self, path: str):
+        fields: Dict[str, str] = {}
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line:
+                    self._add_stanza(fields)
+                    fields = {}
+                elif line[0].isspace():
+                    # Continuation lines only matter for the long description, which we skip
+                    continue
+                elif ":" in line:
+                    key, _, value = line.partition(":")
+                    fields[key] = value.strip()
+        self._add_stanza(fields)
+    
+    def _add_stanza(self, fields: Dict[str, str]):
+        name = fields.get("Package")
+        if not name:
+            return
+        depends = parse_depends(fields.get("Pre-Depends", "")) + parse_depends(fields.get("Depends", ""))
+        self.packages[name] = [
+            fields.get("Version", ""),
+            fields.get("Description", ""),
+            int(fields.get("Size", "0") or 0),
+            int(fields.get("Installed-Size", "0") or 0) * 1024,
+            depends,
+            parse_depends(fields.get("Provides", "")),
+        ]
+    
+    def index_provides(self):
+        self.provides = {}
+        for name, entry in self.packages.items():
+            for virtual in entry[5]:
+                self.provides.setdefault(virtual, name)
+    
+    def resolve(self, name: str) -> Optional[str]:
+        """Real package for a name, following virtual packages"""
+        if name in self.packages:
+            return name
+        return self.provides.get(name)
+    
+    def closure(self, names: List[str], seen: Optional[set] = None) -> Tuple[List[str], List[str]]:
+        """Packages needed for names (dependencies first-seen order) and names apt doesn't know"""
+        seen = set() if seen is None else seen
+        needed, unavailable = [], []
+        stack = list(reversed(names))
+        while stack:
+            name = stack.pop()
+            package = self.resolve(name)
+            if package is None:
+                if name not in unavailable:
+                    unavailable.append(name)
+                continue
+            if package in seen:
+                continue
+            seen.add(package)
+            needed.append(package)
+            stack.extend(reversed(self.packages[package][4]))
+        return needed, unavailable
+    
+    @staticmethod
+    def score(query: str, name: str, description: str) -> int:
+        """Fuzzy match score: exact > prefix > substring > subsequence > description"""
+        if name == query:
+            return 100
+        if name.startswith(query):
+            return 90 - min(len(name) - len(query), 20)
+        if query in name:
+            return 70 - min(name.index(query), 20)
+        position = 0
+        for char in query:
+            position = name.find(char, position)
+            if position == -1:
+                break
+            position += 1
+        else:
+            return 40 - min(len(name) - len(query), 20)
+        if query in description.lower():
+            return 10
+        return 0
+    
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, list]]:
+        query = query.strip().lower()
+        if not query:
+            return []
+        matches = []
+        for name, entry in self.packages.items():
+            score = self.score(query, name, entry[1])
+            if score:
+                matches.append((-score, name))
+        matches.sort()
+        return [(name, self.packages[name]) for _, name in matches[:limit]]
+
+
+# Command a package provides when it differs from the package name; None = no command to probe
+PACKAGE_COMMANDS = {
+    "python": "python3", "python-pip": "pip", "netcat-openbsd": "nc", "dnsutils": "dig",
+    "proxychains-ng": "proxychains4", "imagemagick": "magick", "ripgrep": "rg", "nodejs": "node",
+    "golang": "go", "rust": "rustc", "openjdk-17": "java", "subversion": "svn", "mercurial": "hg",
+    "bash-completion": None, "command-not-found": None
+}
+
+# Import name of a pip distribution when it differs from the normalized name
+MODULE_IMPORTS = {
+    "beautifulsoup4": "bs4", "pillow": "PIL", "pycryptodome": "Crypto", "pyyaml": "yaml",
+    "python-dateutil": "dateutil", "pwntools": "pwn"
+}
+
+VERSION_ARGS = {
+    "nikto": ["-Version"], "hydra": ["-h"], "screen": ["-v"], "java": ["-version"], "go": ["version"],
+    "svn": ["--version", "--quiet"], "mc": ["-V"], "tmux": ["-V"], "ranger": ["--version"]
+}
+# Commands whose version flag exits non-zero even on a working install
+VERSION_NONZERO = {"hydra", "screen"}
+
+
+class InstallVerifier:
+    """Check expected commands, packages and Python modules concurrently, caching version probes"""
+    
+    def __init__(self, cache_path: str, installed: InstalledIndex, search_path: Optional[str] = None,
+                 timeout: float = 5.0, max_workers: int = 8):
+        self.cache_path = cache_path
+        self.installed = installed
+        self.search_path = search_path
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.cache: Dict[str, Dict] = {}
+        self.cache_hits = 0
+        self.lock = threading.Lock()
+    
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                self.cache = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error reading verify cache {self.cache_path}: {e}")
+        return self
+    
+    def save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.cache, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+    
+    def probe_version(self, path: str, command: str) -> Tuple[str, Optional[str]]:
+        """Status and first output line of `command --version`, cached on the binary's path, mtime and size"""
+        stat = os.stat(path)
+        key = f"{os.path.realpath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        with self.lock:
+            if key in self.cache:
+                self.cache_hits += 1
+                version = self.cache[key]["version"]
+                return ("ok" if version else "no version"), version
+        
+        try:
+            result = subprocess.run([path] + VERSION_ARGS.get(command, ["--version"]), capture_output=True,
+                                    text=True, errors="replace", timeout=self.timeout, stdin=subprocess.DEVNULL)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            logger.error(f"Version probe failed for {path}: {e}")
+            return "broken", None
+        if result.returncode != 0 and command not in VERSION_NONZERO:
+            # A crashing binary (missing library, bad interpreter) prints an error, not a version
+            logger.error(f"Version probe for {path} exited {result.returncode}: {result.stderr.strip()[:200]}")
+            return "broken", None
+        
+        version = None
+        for line in (result.stdout + "\n" + result.stderr).splitlines():
+            if line.strip():
+                version = line.strip()[:80]
+                break
+        with self.lock:
+            self.cache[key] = {"version": version, "probed": time.time()}
+        return ("ok" if version else "no version"), version
+    
+    def check(self, item: Dict) -> Dict:
+        result = dict(item, status="missing", path=None, version=None)
+        if item["kind"] == "module":
+            from importlib import util, metadata
+            
+            import_name = MODULE_IMPORTS.get(normalize_module_name(item["name"]), item["name"].replace("-", "_"))
+            try:
+                spec = util.find_spec(import_name)
+            except (ImportError, ValueError):
+                spec = None
+            if spec is not None:
+                result["status"] = "ok"
+                result["path"] = spec.origin
+                try:
+                    result["version"] = metadata.version(item["name"])
+                except metadata.PackageNotFoundError:
+                    pass
+            return result
+        
+        command = item.get("command")
+        if command:
+            path = shutil.which(command, path=self.search_path)
+            if path:
+                result["path"] = path
+                result["status"], result["version"] = self.probe_version(path, command)
+                return result
+        if item["kind"] == "package" and self.installed.is_installed(item["name"]):
+            # Installed per dpkg but the expected command isn't on PATH
+            result["status"] = "installed" if not command else "no command"
+        return result
+    
+    def run(self, items: List[Dict]) -> Dict:
+        """Check all items; the report is ok only when every required item passed"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        self.load_cache()
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self.check, items))
+        try:
+            self.save_cache()
+        except Exception as e:
+            logger.error(f"Error saving verify cache: {e}")
+        
+        missing = [r["name"] for r in results if r["status"] in ("missing", "broken")]
+        required_missing = [r["name"] for r in results if r["status"] in ("missing", "broken") and r["required"]]
+        return {
+            "checked": time.time(),
+            "elapsed": time.monotonic() - start,
+            "cache_hits": self.cache_hits,
+            "ok": not required_missing,
+            "passed": len(results) - len(missing),
+            "missing": missing,
+            "required_missing": required_missing,
+            "results": results
+        }
+
+
+class SetupJournal:
+    """On-disk record of finished setup steps and packages"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {"started": None, "completed": None, "steps": {}, "packages": {}}
+    
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.data.update(data)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error reading journal {self.path}: {e}")
+        return self
+    
+    def save(self):
+        """Write the journal atomically so an interrupted run never corrupts it"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+    
+    def start_run(self, force: bool = False, profile: str = "default"):
+        """Begin a run, keeping progress from an unfinished previous run of the same profile"""
+        with self.lock:
+            if (force or self.data.get("completed") or not self.data.get("started")
+                    or self.data.get("profile", "default") != profile):
+                self.data = {"started": time.time(), "completed": None, "steps": {}, "packages": {},
+                             "profile": profile}
+                self.save()
+    
+    def finish_run(self):
+        with self.lock:
+            self.data["completed"] = time.time()
+            self.save()
+    
+    def is_step_done(self, name: str) -> bool:
+        return self.data["steps"].get(name, {}).get("status") == "done"
+    
+    def record_step(self, name: str, status: str = "done"):
+        with self.lock:
+            self.data["steps"][name] = {"status": status, "finished": time.time()}
+            self.save()
+    
+    def record_packages(self, versions: Dict[str, str], pkg_manager: str = "pkg"):
+        with self.lock:
+            now = time.time()
+            for name, version in versions.items():
+                self.data["packages"][f"{pkg_manager}:{name}"] = {"version": version, "finished": now}
+            self.save()
 
-if missing_modules:
-    print(f"Missing modules: {', '.join(missing_modules)}")
-    print("Installing missing modules...")
-    subprocess.run([sys.executable, "-m", "pip", "install"] + missing_modules)
 
-from colorama import init, Fore, Back, Style
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
+class SetupStep:
+    """A unit of work for the step scheduler"""
+    
+    def __init__(self, name: str, func: Callable, needs: Iterable[str] = (),
+                 provides: Iterable[str] = (), dpkg_lock: bool = False, retries: int = 1):
+        self.name = name
+        self.func = func
+        self.needs = set(needs)
+        # Every step implicitly provides its own name so others can order after it
+        self.provides = set(provides) | {name}
+        self.dpkg_lock = dpkg_lock
+        self.retries = retries
 
-# Initialize colorama for cross-platform color support
-init(autoreset=True)
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('setup.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+class StepScheduler:
+    """Run setup steps concurrently once their needs are met"""
+    
+    def __init__(self, steps: List[SetupStep], max_workers: int = 3,
+                 dpkg_lock: Optional[threading.Lock] = None,
+                 on_step_done: Optional[Callable[[Dict], None]] = None,
+                 trace: Optional[RunTrace] = None):
+        self.steps = steps
+        self.trace = trace
+        self.max_workers = max_workers
+        self.dpkg_lock = dpkg_lock or threading.Lock()
+        self.on_step_done = on_step_done
+        self.timeline: List[Dict] = []
+        self.start_time = 0.0
+    
+    def dependencies(self) -> Dict[str, set]:
+        """Map each step to the steps providing what it needs"""
+        providers: Dict[str, set] = {}
+        for step in self.steps:
+            for capability in step.provides:
+                providers.setdefault(capability, set()).add(step.name)
+        
+        deps = {}
+        for step in self.steps:
+            deps[step.name] = set()
+            for need in step.needs:
+                # Needs nobody provides are assumed to be satisfied already
+                deps[step.name] |= providers.get(need, set()) - {step.name}
+        return deps
+    
+    def run_step(self, step: SetupStep) -> Dict:
+        """Run one step with retries, holding the dpkg lock if required"""
+        entry = {"name": step.name, "start": None, "end": None, "attempts": 0, "status": "failed", "error": ""}
+        
+        for attempt in range(step.retries + 1):
+            entry["attempts"] = attempt + 1
+            lock = self.dpkg_lock if step.dpkg_lock else None
+            if lock:
+                lock.acquire()
+            try:
+                if entry["start"] is None:
+                    entry["start"] = time.monotonic() - self.start_time
+                print(f"\n{Fore.YELLOW}▶ {step.name}")
+                result = step.func()
+                if result is not False:
+                    entry["status"] = "ok"
+                    break
+                entry["error"] = "step reported failure"
+            except Exception as e:
+                entry["error"] = str(e)
+                logger.error(f"Step {step.name} failed: {e}")
+            finally:
+                if lock:
+                    lock.release()
+            
+            if attempt < step.retries:
+                print(f"{Fore.YELLOW}[!] {step.name} failed, retrying ({attempt + 1}/{step.retries})...")
+        
+        entry["end"] = time.monotonic() - self.start_time
+        if self.trace and entry["start"] is not None:
+            self.trace.record("step", step.name, self.start_time + entry["start"], self.start_time + entry["end"],
+                              status=entry["status"], attempts=entry["attempts"])
+        if entry["status"] == "ok":
+            print(f"{Fore.GREEN}✓ {step.name} completed")
+        else:
+            print(f"{Fore.RED}✗ {step.name} failed: {entry['error']}")
+        return entry
+    
+    def run(self) -> List[Dict]:
+        """Schedule all steps and return the timeline"""
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        
+        self.start_time = time.monotonic()
+        self.timeline = []
+        deps = self.dependencies()
+        pending = list(self.steps)
+        finished = set()
+        failed = set()
+        running = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                skipped = True
+                while skipped:
+                    # A failed or skipped provider skips its dependents, and theirs in turn
+                    skipped = [step for step in pending if deps[step.name] & failed]
+                    for step in skipped:
+                        pending.remove(step)
+                        failed.add(step.name)
+                        blockers = ", ".join(sorted(deps[step.name] & failed))
+                        print(f"{Fore.YELLOW}[!] Skipping {step.name}: needs {blockers}")
+                        self.timeline.append({"name": step.name, "start": None, "end": None, "attempts": 0,
+                                              "status": "skipped", "error": f"needs {blockers}"})
+                
+                for step in list(pending):
+                    if deps[step.name] <= finished:
+                        pending.remove(step)
+                        running[executor.submit(self.run_step, step)] = step
+                
+                if not running:
+                    # Remaining steps depend on each other in a cycle
+                    for step in pending:
+                        logger.error(f"Step {step.name} has unresolvable dependencies")
+                        self.timeline.append({"name": step.name, "start": None, "end": None,
+                                              "attempts": 0, "status": "skipped", "error": "dependency cycle"})
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    entry = future.result()
+                    self.timeline.append(entry)
+                    (finished if entry["status"] == "ok" else failed).add(step.name)
+                    if self.on_step_done:
+                        self.on_step_done(entry)
+        
+        return self.timeline
+    
+    def display_timeline(self, width: int = 20):
+        """Show when each step ran and what overlapped"""
+        ran = [entry for entry in self.timeline if entry["start"] is not None]
+        total = max([entry["end"] for entry in ran] + [0.001])
+        
+        table = rich_table(title="Setup Timeline")
+        table.add_column("Step")
+        table.add_column("Start", justify="right")
+        table.add_column("Duration", justify="right")
+        table.add_column("Tries", justify="right")
+        table.add_column("Timeline", no_wrap=True)
+        table.add_column("Status")
+        
+        for entry in sorted(self.timeline, key=lambda e: (e["start"] is None, e["start"] or 0)):
+            if entry["start"] is None:
+                table.add_row(entry["name"], "-", "-", "0", "", entry["status"])
+                continue
+            first = int(entry["start"] / total * width)
+            last = max(first + 1, int(entry["end"] / total * width))
+            bar = " " * first + "█" * (last - first) + " " * (width - last)
+            status = "[green]ok[/green]" if entry["status"] == "ok" else f"[red]{entry['status']}[/red]"
+            table.add_row(entry["name"], f"{entry['start']:.1f}s", f"{entry['end'] - entry['start']:.1f}s",
+                          str(entry["attempts"]), bar, status)
+        
+        get_console().print(table)
 
-console = Console()
 
 class BLACK_MUMBASetup:
     def __init__(self):
@@ -59,6 +2152,23 @@ class BLACK_MUMBASetup:
         self.tools_dir = os.path.join(self.home_dir, "tools")
         self.scripts_dir = os.path.join(self.home_dir, "scripts")
         self.wordlists_dir = os.path.join(self.home_dir, "wordlists")
+        self.prefix = os.environ.get("PREFIX", TERMUX_PREFIX)
+        self.force = False
+        self.installed_index: Optional[InstalledIndex] = None
+        self.dpkg_lock = threading.Lock()
+        self.state_dir = os.path.join(self.home_dir, ".blackmumba")
+        self.journal = SetupJournal(os.path.join(self.state_dir, "journal.json"))
+        self.output_tail_lines = 50
+        self.trace = RunTrace(os.path.join(self.state_dir, "traces", time.strftime("trace-%Y%m%d-%H%M%S.jsonl")))
+        self.chrome_trace_path: Optional[str] = None
+        self.engine = CommandEngine(tail_lines=self.output_tail_lines, trace=self.trace)
+        self.mirror_candidates = list(TERMUX_MIRRORS)
+        self.pip_index = os.environ.get("BM_PIP_INDEX", "https://pypi.org/simple")
+        self.mirror_selected = False
+        self.mirror_changed = False
+        self.profile = load_profile("default")
+        self.prefetch = True
+        self.prefetch_segments = 4
         
     def check_termux(self) -> bool:
         """Check if running inside Termux"""
@@ -114,85 +2224,300 @@ class BLACK_MUMBASetup:
         except:
             pass
     
-    def run_command(self, command: List[str], description: str = "") -> bool:
-        """Run a shell command with progress indicator"""
+    def stream_command(self, command: List[str], on_line: Optional[Callable[[str], None]] = None,
+                       cwd: Optional[str] = None) -> subprocess.CompletedProcess:
+        """Run a command, reading its output incrementally into a bounded buffer"""
+        tail = deque(maxlen=self.output_tail_lines)
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+            cwd=cwd,
+            shell=False
+        )
         try:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                BarColumn(),
-                console=console
-            ) as progress:
-                task = progress.add_task(description, total=None)
-                
-                result = subprocess.run(
-                    command,
-                    capture_output=True,
-                    text=True,
-                    shell=False
-                )
-                
-                progress.update(task, completed=True)
-                
-                if result.returncode != 0:
-                    logger.error(f"Command failed: {' '.join(command)}")
-                    logger.error(f"Error: {result.stderr}")
-                    return False
+            for line in process.stdout:
+                tail.append(line.rstrip("\n"))
+                if on_line:
+                    on_line(line)
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        return subprocess.CompletedProcess(command, returncode, "\n".join(tail), None)
+    
+    def run_command(self, command: List[str], description: str = "", cwd: Optional[str] = None,
+                    on_output: Optional[Callable[[str], None]] = None) -> bool:
+        """Run a shell command with progress indicator; on_output receives every output line"""
+        start = time.monotonic()
+        cpu_before = children_cpu_time()
+        output_bytes = 0
+        returncode = None
+        
+        def count_line(line: str):
+            nonlocal output_bytes
+            output_bytes += len(line)
+            if on_output:
+                on_output(line)
+        
+        try:
+            if not live_display_lock.acquire(blocking=False):
+                # Another command owns the spinner; run this one quietly
+                print(f"{Fore.CYAN}[*] {description}")
+                result = self.stream_command(command, count_line, cwd=cwd)
+            else:
+                try:
+                    console = get_console()
+                    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
                     
-                return True
+                    with Progress(
+                        SpinnerColumn(),
+                        TextColumn("[progress.description]{task.description}"),
+                        BarColumn(),
+                        TextColumn("{task.fields[detail]}"),
+                        console=console
+                    ) as progress:
+                        task = progress.add_task(description, total=None, detail="")
+                        parser = OutputProgress()
+                        
+                        def on_line(line: str):
+                            count_line(line)
+                            if parser.feed(line):
+                                percentage = parser.percentage
+                                if percentage is not None:
+                                    progress.update(task, total=100, completed=percentage, detail=parser.detail)
+                                else:
+                                    progress.update(task, detail=parser.detail)
+                        
+                        result = self.stream_command(command, on_line, cwd=cwd)
+                        
+                        progress.update(task, total=100, completed=100)
+                finally:
+                    live_display_lock.release()
+            
+            returncode = result.returncode
+            if result.returncode != 0:
+                logger.error(f"Command failed: {' '.join(command)}")
+                logger.error(f"Error (last {self.output_tail_lines} lines): {result.stdout}")
+                return False
+                
+            return True
                 
         except Exception as e:
             logger.error(f"Exception running command: {e}")
             return False
+        finally:
+            # RUSAGE_CHILDREN also counts commands finishing in other threads meanwhile
+            self.trace.record("command", description or " ".join(command), start, time.monotonic(),
+                              command=command, exit_code=returncode, output_bytes=output_bytes,
+                              cpu_time=round(children_cpu_time() - cpu_before, 3),
+                              packages=command_packages(command))
+    
+    def run_commands(self, commands: List[Tuple[List[str], str]]) -> List[bool]:
+        """Run (command, description) pairs concurrently through the command engine"""
+        for _, description in commands:
+            print(f"{Fore.CYAN}[*] {description}")
+        
+        results = []
+        for (command, description), result in zip(commands, self.engine.run_all([c for c, _ in commands])):
+            if result.returncode != 0:
+                logger.error(f"Command failed: {' '.join(command)}")
+                logger.error(f"Error (last {self.output_tail_lines} lines): {result.stdout}")
+                print(f"{Fore.RED}[-] {description} failed")
+            results.append(result.returncode == 0)
+        return results
+    
+    def build_install_command(self, packages: List[str], pkg_manager: str = "pkg") -> Optional[List[str]]:
+        """Build a single install command for one or more packages"""
+        if pkg_manager == "pkg":
+            return ["pkg", "install", "-y"] + packages
+        elif pkg_manager == "apt":
+            return ["apt-get", "install", "-y"] + packages
+        elif pkg_manager == "pip":
+            return ["pip", "install", "--upgrade"] + packages
+        return None
+    
+    def install_batch(self, package_list: List[str], pkg_manager: str = "pkg") -> Dict[str, bool]:
+        """Install a list in one transaction, bisecting on failure to isolate bad packages"""
+        results: Dict[str, bool] = {}
+        pending = [list(package_list)]
+        
+        while pending:
+            packages = pending.pop()
+            cmd = self.build_install_command(packages, pkg_manager)
+            if cmd is None:
+                for package in packages:
+                    results[package] = False
+                continue
+            
+            if len(packages) == 1:
+                description = f"Installing {packages[0]}"
+            else:
+                description = f"Installing {len(packages)} packages"
+            
+            if self.run_command(cmd, description):
+                for package in packages:
+                    results[package] = True
+            elif len(packages) == 1:
+                results[packages[0]] = False
+            else:
+                # Split the failed batch in half and retry both sides
+                middle = len(packages) // 2
+                print(f"{Fore.YELLOW}[!] Batch of {len(packages)} failed, splitting...")
+                pending.append(packages[middle:])
+                pending.append(packages[:middle])
+        
+        return results
     
-    def install_packages(self, package_list: List[str], pkg_manager: str = "pkg") -> bool:
+    def install_packages(self, package_list: List[str], pkg_manager: str = "pkg", batched: bool = True) -> bool:
         """Install packages using pkg or pip"""
         if not package_list:
             return True
+        
+        package_list = self.filter_installed(package_list, pkg_manager)
+        if not package_list:
+            return True
             
         print(f"\n{Fore.CYAN}Installing {len(package_list)} packages...")
+        if pkg_manager != "pip" and self.prefetch:
+            self.prefetch_packages(package_list)
+        
+        if batched:
+            results = self.install_batch(package_list, pkg_manager)
+            for package in package_list:
+                if results.get(package):
+                    print(f"{Fore.GREEN}[+] Installed: {package}")
+                else:
+                    print(f"{Fore.RED}[-] Failed to install: {package}")
+            self.record_installed([p for p in package_list if results.get(p)], pkg_manager)
+            return all(results.get(package, False) for package in package_list)
         
+        success = True
+        installed = []
         for package in package_list:
             print(f"{Fore.YELLOW}[+] Installing: {package}")
             
-            if pkg_manager == "pkg":
-                cmd = ["pkg", "install", "-y", package]
-            elif pkg_manager == "pip":
-                cmd = ["pip", "install", "--upgrade", package]
-            else:
+            cmd = self.build_install_command([package], pkg_manager)
+            if cmd is None:
                 continue
                 
             if not self.run_command(cmd, f"Installing {package}"):
                 print(f"{Fore.RED}[-] Failed to install: {package}")
+                success = False
                 # Continue with other packages
-                
-        return True
+            else:
+                installed.append(package)
+        
+        self.record_installed(installed, pkg_manager)
+        return success
+    
+    def prefetch_packages(self, packages: List[str]) -> Dict:
+        """Download the .debs a batch needs in parallel so apt installs from its cache"""
+        if not shutil.which("apt-get"):
+            return {}
+        
+        lines: List[str] = []
+        self.run_command(["apt-get", "install", "-y", "-qq", "--print-uris"] + packages,
+                         "Listing package archives", on_output=lines.append)
+        # A failed listing (unknown names etc.) is reported by the install itself
+        entries = parse_print_uris("".join(lines))
+        if not entries:
+            return {}
+        
+        total = sum(entry["size"] for entry in entries)
+        print(f"{Fore.YELLOW}[+] Prefetching {len(entries)} archives ({format_size(total)})...")
+        prefetcher = ArchivePrefetcher(os.path.join(self.prefix, "var", "cache", "apt", "archives"),
+                                       segments=self.prefetch_segments)
+        start = time.monotonic()
+        try:
+            stats = prefetcher.download(entries)
+        except Exception as e:
+            logger.error(f"Error prefetching packages: {e}")
+            return {}
+        elapsed = time.monotonic() - start
+        self.trace.record("prefetch", f"{len(entries)} archives", start, start + elapsed,
+                          backend=stats["backend"], bytes=stats["bytes"], failed=len(stats["failed"]))
+        
+        rate = f", {format_size(stats['bytes'] / elapsed)}/s" if stats["bytes"] and elapsed else ""
+        print(f"{Fore.GREEN}[+] Prefetched {stats['downloaded']} via {stats['backend']}, "
+              f"{stats['cached']} already cached ({elapsed:.1f}s{rate})")
+        if stats["failed"]:
+            print(f"{Fore.YELLOW}[!] {len(stats['failed'])} archives left for apt to fetch")
+        return stats
+    
+    def get_installed_index(self) -> InstalledIndex:
+        """Build the installed-state index once per run"""
+        if self.installed_index is None:
+            self.installed_index = InstalledIndex(self.prefix).load()
+        return self.installed_index
+    
+    def filter_installed(self, package_list: List[str], pkg_manager: str = "pkg") -> List[str]:
+        """Drop items that are already installed unless forced"""
+        if self.force:
+            return list(package_list)
+        
+        missing = self.get_installed_index().missing(package_list, pkg_manager)
+        skipped = len(package_list) - len(missing)
+        if skipped:
+            print(f"{Fore.CYAN}[*] {skipped} already installed, skipping")
+        return missing
+    
+    def record_installed(self, packages: List[str], pkg_manager: str = "pkg"):
+        """Store installed versions in the index and the journal"""
+        if not packages:
+            return
+        
+        if pkg_manager == "pip":
+            current = InstalledIndex.read_pip_metadata()
+            versions = {p: current.get(normalize_module_name(p), "") for p in packages}
+        else:
+            current = InstalledIndex.read_dpkg_status(self.get_installed_index().status_file)
+            versions = {p: current.get(p, "") for p in packages}
+        
+        index = self.get_installed_index()
+        for package, version in versions.items():
+            index.mark_installed(package, pkg_manager, version)
+        
+        try:
+            self.journal.record_packages(versions, pkg_manager)
+        except Exception as e:
+            logger.error(f"Error writing journal: {e}")
     
     def setup_termux(self):
         """Initial Termux setup and configuration"""
         print(f"\n{Fore.GREEN}[*] Setting up Termux environment...")
         
+        self.update_package_lists()
+        self.prepare_environment()
+        
+        print(f"{Fore.GREEN}[✓] Termux setup completed!")
+    
+    def update_package_lists(self):
+        """Refresh and upgrade packages and enable storage access"""
         # Update package lists
-        self.run_command(["pkg", "update", "-y"], "Updating package lists")
+        success = self.run_command(["pkg", "update", "-y"], "Updating package lists")
         
         # Upgrade existing packages
-        self.run_command(["pkg", "upgrade", "-y"], "Upgrading packages")
+        success = self.run_command(["pkg", "upgrade", "-y"], "Upgrading packages") and success
         
         # Enable storage access
         print(f"{Fore.YELLOW}[+] Setting up storage access...")
-        self.run_command(["termux-setup-storage"], "Setting up storage")
-        
+        success = self.run_command(["termux-setup-storage"], "Setting up storage") and success
+        return success
+    
+    def prepare_environment(self):
+        """Create working directories and the shell prompt"""
         # Create directories
         directories = [self.tools_dir, self.scripts_dir, self.wordlists_dir]
         for directory in directories:
             if not os.path.exists(directory):
-                os.makedirs(directory)
+                os.makedirs(directory, exist_ok=True)
                 print(f"{Fore.GREEN}[+] Created: {directory}")
         
         # Setup custom bashrc
         self.setup_shell_prompt()
-        
-        print(f"{Fore.GREEN}[✓] Termux setup completed!")
     
     def setup_shell_prompt(self):
         """Setup a clean custom shell prompt"""
@@ -208,9 +2533,23 @@ alias la='ls $LS_OPTIONS -la'
 """
         
         try:
-            with open(bashrc_path, "a") as f:
-                f.write(prompt_config)
+            # Earlier versions appended prompt_config verbatim on every run
+            config = ManagedConfig(bashrc_path)
+            text, updated, removed = config.render_block("prompt", prompt_config, legacy=[prompt_config])
+            if updated == text:
+                print(f"{Fore.CYAN}[*] Custom prompt already configured")
+                return
+            
+            # Only worth timing bash startup when .bashrc actually changes
+            before = time_shell_startup(bashrc_path)
+            config.write_atomic(updated)
+            after = time_shell_startup(bashrc_path)
+            
             print(f"{Fore.GREEN}[+] Custom prompt configured")
+            if removed:
+                print(f"{Fore.GREEN}[+] Removed {removed} duplicate prompt blocks from .bashrc")
+            if before is not None and after is not None:
+                print(f"{Fore.CYAN}[*] .bashrc startup: {before * 1000:.0f} ms -> {after * 1000:.0f} ms")
         except Exception as e:
             logger.error(f"Error setting up shell prompt: {e}")
     
@@ -218,110 +2557,344 @@ alias la='ls $LS_OPTIONS -la'
         """Install core system packages"""
         print(f"\n{Fore.GREEN}[*] Installing core packages...")
         
-        core_packages = [
-            "python", "python-pip", "git", "curl", "wget",
-            "nano", "vim", "unzip", "zip", "tar", "clang",
-            "make", "cmake"
-        ]
-        
-        self.install_packages(core_packages, "pkg")
-        print(f"{Fore.GREEN}[✓] Core packages installed!")
+        success = self.install_packages(self.profile["core"], "pkg")
+        if success:
+            print(f"{Fore.GREEN}[✓] Core packages installed!")
+        else:
+            print(f"{Fore.YELLOW}[!] Some core packages failed to install")
+        return success
     
     def install_security_tools(self):
         """Install security tools"""
         print(f"\n{Fore.GREEN}[*] Installing security tools...")
         
-        security_packages = [
-            "nmap", "hydra", "nikto"
-        ]
-        
-        self.install_packages(security_packages, "pkg")
+        success = self.install_security_packages()
+        if self.profile["sqlmap"]:
+            success = self.install_sqlmap() and success
         
-        # Install sqlmap from git (not always in Termux repos)
+        if success:
+            print(f"{Fore.GREEN}[✓] Security tools installed!")
+        else:
+            print(f"{Fore.YELLOW}[!] Some security tools failed to install")
+        return success
+    
+    def install_security_packages(self):
+        """Install security tools available from the Termux repos"""
+        return self.install_packages(self.profile["security"], "pkg")
+    
+    def install_sqlmap(self):
+        """Install sqlmap from git (not always in Termux repos)"""
         print(f"{Fore.YELLOW}[+] Installing sqlmap from GitHub...")
         sqlmap_dir = os.path.join(self.tools_dir, "sqlmap")
         
-        if os.path.exists(sqlmap_dir):
+        success = True
+        if os.path.isdir(os.path.join(sqlmap_dir, ".git")) and not self.force:
+            print(f"{Fore.CYAN}[*] sqlmap already cloned, skipping (use Update All to pull)")
+        elif os.path.exists(sqlmap_dir):
             print(f"{Fore.CYAN}[*] sqlmap already exists, updating...")
-            self.run_command(["git", "-C", sqlmap_dir, "pull"], "Updating sqlmap")
+            success = self.run_command(["git", "-C", sqlmap_dir, "pull"], "Updating sqlmap")
         else:
-            self.run_command(
-                ["git", "clone", "--depth", "1", "https://github.com/sqlmapproject/sqlmap.git", sqlmap_dir],
+            success = self.run_command(
+                ["git", "clone", "--depth", "1", SQLMAP_REPO, sqlmap_dir],
                 "Cloning sqlmap"
             )
+        if not success:
+            return False
+        
+        self.link_sqlmap(sqlmap_dir)
         
-        # Create symlink for easy access
+        try:
+            registry = ToolRegistry(os.path.join(self.state_dir, "tools.json")).load()
+            registry.register("sqlmap", SQLMAP_REPO, sqlmap_dir, shallow=True)
+            registry.save()
+        except Exception as e:
+            logger.error(f"Error registering sqlmap: {e}")
+        return True
+    
+    def link_sqlmap(self, sqlmap_dir: str):
+        """Create symlink for easy access"""
         bin_dir = os.path.join(self.home_dir, "bin")
         os.makedirs(bin_dir, exist_ok=True)
         sqlmap_bin = os.path.join(bin_dir, "sqlmap")
-        if not os.path.exists(sqlmap_bin):
+        if not os.path.lexists(sqlmap_bin):
             os.symlink(os.path.join(sqlmap_dir, "sqlmap.py"), sqlmap_bin)
             os.chmod(sqlmap_bin, 0o755)
-        
-        print(f"{Fore.GREEN}[✓] Security tools installed!")
     
     def install_python_modules(self):
         """Install Python modules via pip"""
         print(f"\n{Fore.GREEN}[*] Installing Python modules...")
         
-        python_modules = [
-            "requests", "rich", "colorama", "tqdm",
-            "scapy", "beautifulsoup4", "lxml", "pillow",
-            "pycryptodome", "paramiko", "netifaces"
-        ]
-        
-        self.install_packages(python_modules, "pip")
-        print(f"{Fore.GREEN}[✓] Python modules installed!")
+        success = self.install_packages(self.profile["python"], "pip")
+        if success:
+            print(f"{Fore.GREEN}[✓] Python modules installed!")
+        else:
+            print(f"{Fore.YELLOW}[!] Some Python modules failed to install")
+        return success
     
     def install_extra_utilities(self):
         """Install everyday utilities commonly used in Termux"""
         print(f"\n{Fore.GREEN}[*] Installing extra utilities...")
         
-        extra_packages = [
-            # System monitoring
-            "htop", "neofetch", "tree", "ncdu", "duf",
-            # Shell enhancements
-            "bash-completion", "command-not-found",
-            # Text processing
-            "jq", "ripgrep", "fd", "bat", "exa",
-            # Networking
-            "netcat-openbsd", "socat", "tcpdump", "traceroute", "mtr", "whois", "dnsutils",
-            # File transfer
-            "rsync", "rclone", "aria2", "lftp",
-            # Development
-            "nodejs", "npm", "yarn", "golang", "rust", "php", "perl", "ruby", "openjdk-17",
-            # Version control
-            "subversion", "mercurial",
-            # Terminal multiplexers & file managers
-            "tmux", "screen", "ranger", "mc",
-            # Documentation
-            "man", "tldr",
-            # Media
-            "ffmpeg", "imagemagick", "yt-dlp",
-            # Security/privacy tools
-            "proxychains-ng", "tor"
-        ]
+        success = self.install_packages(self.profile["extra"], "pkg")
+        if success:
+            print(f"{Fore.GREEN}[✓] Extra utilities installed!")
+        else:
+            print(f"{Fore.YELLOW}[!] Some extra utilities failed to install")
+        return success
+    
+    def resolve_dependencies(self, packages: List[str]) -> List[str]:
+        """Full dependency closure of packages according to the local apt index"""
+        result = subprocess.run(
+            ["apt-cache", "depends", "--recurse", "--no-recommends", "--no-suggests",
+             "--no-conflicts", "--no-breaks", "--no-replaces", "--no-enhances"] + packages,
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            logger.error(f"Error resolving dependencies: {result.stderr}")
+            return list(packages)
+        
+        closure = []
+        for line in result.stdout.splitlines():
+            # Dependency detail lines are indented; virtual packages are shown as <name>
+            if line and not line[0].isspace() and not line.startswith("<") and line not in closure:
+                closure.append(line)
+        return closure
+    
+    def export_bundle(self, bundle_path: str) -> bool:
+        """Pack .deb archives, pip wheels and git tools into one offline bundle"""
+        import tarfile
+        import tempfile
+        
+        print(f"\n{Fore.GREEN}[*] Exporting offline bundle to {bundle_path}...")
+        os.makedirs(self.state_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix="bundle-", dir=self.state_dir)
+        
+        try:
+            packages = self.resolve_dependencies(self.profile["core"] + self.profile["security"] + self.profile["extra"])
+            
+            # Reuse cached archives of exactly the installed version, fetch everything else
+            from urllib.parse import unquote
+            
+            installed = InstalledIndex.read_dpkg_status(InstalledIndex(self.prefix).status_file)
+            debs: Dict[str, str] = {}
+            archive_dir = os.path.join(self.prefix, "var", "cache", "apt", "archives")
+            for path in glob.glob(os.path.join(archive_dir, "*.deb")):
+                parts = os.path.basename(path)[:-len(".deb")].split("_")
+                if len(parts) == 3 and installed.get(parts[0]) == unquote(parts[1]):
+                    debs[parts[0]] = path
+            
+            wanted = set(packages)
+            missing = [p for p in packages if p not in debs]
+            download_dir = os.path.join(staging, "debs")
+            os.makedirs(download_dir)
+            if missing:
+                self.run_command(["apt-get", "download"] + missing,
+                                 f"Downloading {len(missing)} package archives", cwd=download_dir)
+                for path in glob.glob(os.path.join(download_dir, "*.deb")):
+                    debs[deb_package_name(path)] = path
+            
+            wheel_dir = os.path.join(staging, "wheels")
+            os.makedirs(wheel_dir)
+            self.run_command(["pip", "wheel", "-w", wheel_dir] + self.profile["python"], "Building pip wheels")
+            
+            # A bundle with gaps is worse than none: offline devices cannot fetch what is missing
+            wheels = {normalize_module_name(os.path.basename(path).split("-", 1)[0])
+                      for path in glob.glob(os.path.join(wheel_dir, "*.whl"))}
+            missing_packages = sorted(wanted - set(debs))
+            missing_modules = [m for m in self.profile["python"] if normalize_module_name(m) not in wheels]
+            if missing_packages or missing_modules:
+                if missing_packages:
+                    print(f"{Fore.RED}[-] No archive for {len(missing_packages)} packages: {', '.join(missing_packages)}")
+                if missing_modules:
+                    print(f"{Fore.RED}[-] No wheel for {len(missing_modules)} modules: {', '.join(missing_modules)}")
+                print(f"{Fore.RED}[-] Bundle not written")
+                logger.error(f"Bundle export incomplete: packages {missing_packages}, modules {missing_modules}")
+                return False
+            
+            manifest = {
+                "format": 1,
+                "created": time.time(),
+                "packages": sorted(name for name in debs if name in wanted),
+                "modules": self.profile["python"],
+                "tools": [],
+                "files": {}
+            }
+            
+            members = []
+            for name in manifest["packages"]:
+                path = debs[name]
+                arcname = f"debs/{os.path.basename(path)}"
+                manifest["files"][arcname] = sha256_file(path)
+                members.append((path, arcname))
+            for path in sorted(glob.glob(os.path.join(wheel_dir, "*"))):
+                arcname = f"wheels/{os.path.basename(path)}"
+                manifest["files"][arcname] = sha256_file(path)
+                members.append((path, arcname))
+            
+            sqlmap_dir = os.path.join(self.tools_dir, "sqlmap")
+            if os.path.isdir(sqlmap_dir):
+                manifest["tools"].append("sqlmap")
+                members.append((sqlmap_dir, "tools/sqlmap"))
+            
+            manifest_path = os.path.join(staging, "manifest.json")
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f, indent=2)
+            
+            # Archives and wheels are already compressed; a plain tar is much faster to write
+            tmp_path = f"{bundle_path}.tmp"
+            with tarfile.open(tmp_path, "w") as bundle:
+                bundle.add(manifest_path, "manifest.json")
+                for path, arcname in members:
+                    bundle.add(path, arcname)
+            os.replace(tmp_path, bundle_path)
+            
+            print(f"{Fore.GREEN}[✓] Bundle written: {len(manifest['packages'])} packages, "
+                  f"{len(manifest['files']) - len(manifest['packages'])} wheels, "
+                  f"{len(manifest['tools'])} tools ({format_size(os.path.getsize(bundle_path))})")
+            return True
+        except Exception as e:
+            logger.error(f"Error exporting bundle: {e}")
+            return False
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    
+    def import_bundle(self, bundle_path: str) -> bool:
+        """Install everything from an offline bundle without network access"""
+        import tarfile
+        import tempfile
+        
+        print(f"\n{Fore.GREEN}[*] Importing offline bundle {bundle_path}...")
+        os.makedirs(self.state_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix="bundle-", dir=self.state_dir)
+        
+        try:
+            with tarfile.open(bundle_path, "r") as bundle:
+                for member in bundle.getmembers():
+                    if member.name.startswith("/") or ".." in member.name.split("/"):
+                        raise ValueError(f"Unsafe path in bundle: {member.name}")
+                if hasattr(tarfile, "data_filter"):
+                    bundle.extractall(staging, filter="data")
+                else:
+                    bundle.extractall(staging)
+            
+            with open(os.path.join(staging, "manifest.json"), "r") as f:
+                manifest = json.load(f)
+            
+            for arcname, digest in manifest.get("files", {}).items():
+                if sha256_file(os.path.join(staging, arcname)) != digest:
+                    raise ValueError(f"Checksum mismatch for {arcname}")
+            
+            success = True
+            
+            debs = sorted(glob.glob(os.path.join(staging, "debs", "*.deb")))
+            names = self.filter_installed([deb_package_name(path) for path in debs], "pkg")
+            debs = [path for path in debs if deb_package_name(path) in names]
+            if debs:
+                # dpkg orders unpack/configure across the whole set, so dependencies inside the bundle resolve
+                if self.run_command(["dpkg", "-i"] + debs, f"Installing {len(debs)} packages from bundle"):
+                    self.record_installed(names, "pkg")
+                else:
+                    success = False
+            
+            modules = self.filter_installed(manifest.get("modules", []), "pip")
+            if modules:
+                wheel_dir = os.path.join(staging, "wheels")
+                if self.run_command(["pip", "install", "--no-index", "--find-links", wheel_dir] + modules,
+                                    f"Installing {len(modules)} Python modules from bundle"):
+                    self.record_installed(modules, "pip")
+                else:
+                    success = False
+            
+            os.makedirs(self.tools_dir, exist_ok=True)
+            for tool in manifest.get("tools", []):
+                target = os.path.join(self.tools_dir, tool)
+                if os.path.exists(target):
+                    print(f"{Fore.CYAN}[*] {tool} already present, skipping")
+                    continue
+                shutil.move(os.path.join(staging, "tools", tool), target)
+                print(f"{Fore.GREEN}[+] Restored: {target}")
+            if "sqlmap" in manifest.get("tools", []):
+                self.link_sqlmap(os.path.join(self.tools_dir, "sqlmap"))
+            
+            print(f"{Fore.GREEN}[✓] Bundle imported!")
+            return success
+        except Exception as e:
+            logger.error(f"Error importing bundle: {e}")
+            print(f"{Fore.RED}[-] Bundle import failed: {e}")
+            return False
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    
+    def select_fastest_mirror(self):
+        """Benchmark mirrors and switch apt to the fastest"""
+        print(f"{Fore.YELLOW}[+] Benchmarking {len(self.mirror_candidates)} mirrors...")
+        results = MirrorBenchmark(self.mirror_candidates).run()
+        self.mirror_selected = True
+        self.mirror_changed = False
+        
+        table = rich_table(title="Mirror Benchmark")
+        table.add_column("Mirror")
+        table.add_column("TTFB", justify="right")
+        table.add_column("Throughput", justify="right")
+        for result in results:
+            if result["error"]:
+                table.add_row(result["url"], "-", f"[red]{result['error'][:30]}[/red]")
+            else:
+                table.add_row(result["url"], f"{result['ttfb'] * 1000:.0f} ms", f"{format_size(result['throughput'])}/s")
+        get_console().print(table)
+        
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(os.path.join(self.state_dir, "mirrors.json"), "w") as f:
+                json.dump({"measured": time.time(), "results": results}, f, indent=2)
+        except Exception as e:
+            logger.error(f"Error saving mirror results: {e}")
+        
+        if not results or results[0]["error"]:
+            print(f"{Fore.RED}[-] No mirror reachable, keeping current sources")
+            return
+        
+        best = results[0]["url"]
+        sources_file = os.path.join(self.prefix, "etc", "apt", "sources.list")
+        try:
+            self.mirror_changed = MirrorBenchmark.write_sources(sources_file, best)
+        except Exception as e:
+            logger.error(f"Error writing apt sources: {e}")
+            return
         
-        self.install_packages(extra_packages, "pkg")
-        print(f"{Fore.GREEN}[✓] Extra utilities installed!")
+        if self.mirror_changed:
+            print(f"{Fore.GREEN}[+] Switched to fastest mirror: {best} (backup: {sources_file}.bak)")
+        else:
+            print(f"{Fore.CYAN}[*] Already using fastest mirror: {best}")
     
     def optimize_system(self):
         """Optimize Termux performance"""
         print(f"\n{Fore.GREEN}[*] Optimizing system...")
         
+        # Setup fast mirrors; full_setup already picks one before updating lists
+        if not self.mirror_selected and not self.journal.is_step_done("Mirror Selection"):
+            self.select_fastest_mirror()
+            if self.mirror_changed:
+                self.run_command(["pkg", "update", "-y"], "Updating package lists")
+        
         # Clean package cache
         self.run_command(["pkg", "clean"], "Cleaning package cache")
         
-        # Setup fast mirrors (if in specific regions)
         termux_properties = os.path.join(self.home_dir, ".termux", "termux.properties")
         
+        properties = (
+            "# Performance optimizations\n"
+            "bell-character=ignore\n"
+            "terminal-margin-horizontal=2\n"
+            "terminal-margin-vertical=2\n"
+        )
+        
         try:
-            os.makedirs(os.path.dirname(termux_properties), exist_ok=True)
-            with open(termux_properties, "a") as f:
-                f.write("\n# Performance optimizations\n")
-                f.write("bell-character=ignore\n")
-                f.write("terminal-margin-horizontal=2\n")
-                f.write("terminal-margin-vertical=2\n")
+            removed = ManagedConfig(termux_properties).update_block(
+                "properties", properties, legacy=["\n" + properties]
+            )
+            if removed:
+                print(f"{Fore.GREEN}[+] Removed {removed} duplicate blocks from termux.properties")
         except Exception as e:
             logger.error(f"Error optimizing system: {e}")
         
@@ -336,25 +2909,367 @@ alias la='ls $LS_OPTIONS -la'
         self.run_command(["pkg", "upgrade", "-y"], "Upgrading packages")
         
         # Update pip packages
-        self.run_command(["pip", "list", "--outdated", "--format=freeze"], "Checking outdated pip packages")
+        self.upgrade_python_modules()
         
         # Update git tools
         self.update_git_tools()
         
         print(f"{Fore.GREEN}[✓] All updates completed!")
     
-    def update_git_tools(self):
-        """Update git-based tools"""
+    def upgrade_python_modules(self) -> bool:
+        """Upgrade outdated managed modules in a single pip resolver pass"""
+        print(f"{Fore.YELLOW}[+] Checking Python modules against {self.pip_index}...")
+        index = PipIndex(self.pip_index)
+        installed = InstalledIndex.read_pip_metadata()
+        outdated = index.outdated(installed, self.profile["python"])
+        
+        if index.failed:
+            print(f"{Fore.RED}[-] Could not check {len(index.failed)} modules: {', '.join(sorted(index.failed))} "
+                  f"(see setup.log)")
+        if not outdated:
+            if index.failed:
+                return False
+            print(f"{Fore.GREEN}[✓] Python modules are up to date")
+            return True
+        
+        for name, (current, latest) in sorted(outdated.items()):
+            print(f"{Fore.CYAN}[*] {name}: {current} -> {latest}")
+        
+        cmd = ["pip", "install", "--upgrade"]
+        if index.url != "https://pypi.org/simple":
+            cmd += ["--index-url", index.url]
+        # Bare names: pip's resolver picks versions that fit this Python and each other
+        cmd += sorted(outdated)
+        
+        if not self.run_command(cmd, f"Upgrading {len(outdated)} Python modules"):
+            print(f"{Fore.RED}[-] Python module upgrade failed")
+            return False
+        self.record_installed(list(outdated), "pip")
+        return True
+    
+    def get_tool_registry(self) -> ToolRegistry:
+        registry = ToolRegistry(os.path.join(self.state_dir, "tools.json")).load()
+        registry.discover(self.tools_dir)
+        return registry
+    
+    def update_git_tools(self, gc_interval: float = 7 * 86400):
+        """Update registered git tools concurrently, skipping trees already at the remote head"""
         print(f"{Fore.YELLOW}[+] Updating git tools...")
         
-        tools_to_update = {
-            "sqlmap": os.path.join(self.tools_dir, "sqlmap")
-        }
+        registry = self.get_tool_registry()
+        tools = {}
+        for name, entry in sorted(registry.tools.items()):
+            if os.path.isdir(os.path.join(entry["path"], ".git")):
+                tools[name] = entry
+        if not tools:
+            print(f"{Fore.CYAN}[*] No git tools registered")
+            return
+        
+        # Compare local heads (read from .git) with one ls-remote per tool
+        heads = {name: read_git_head(entry["path"]) for name, entry in tools.items()}
+        results = self.engine.run_all([
+            ["git", "-C", entry["path"], "ls-remote", "origin",
+             f"refs/heads/{heads[name][0]}" if heads[name][0] else "HEAD"]
+            for name, entry in tools.items()
+        ])
+        
+        stale = []
+        for (name, entry), result in zip(tools.items(), results):
+            remote = parse_ls_remote(result.stdout) if result.returncode == 0 else None
+            if remote is None:
+                print(f"{Fore.RED}[-] {name}: remote not reachable")
+            elif remote == heads[name][1]:
+                print(f"{Fore.GREEN}[✓] {name} is up to date")
+            else:
+                stale.append(name)
+        
+        # Shallow trees fetch just the new tip and move onto it, keeping local edits where possible
+        commands = []
+        for name in stale:
+            entry = tools[name]
+            branch = heads[name][0] or "HEAD"
+            if entry.get("shallow", True):
+                commands.append((["git", "-C", entry["path"], "fetch", "--depth", "1", "origin", branch], name))
+            else:
+                commands.append((["git", "-C", entry["path"], "pull", "--ff-only", "origin", branch], name))
+        
+        updated = []
+        for (command, name), ok in zip(commands, self.run_commands([(c, f"Fetching {n}") for c, n in commands])):
+            if ok:
+                updated.append(name)
+        
+        shallow_updated = [name for name in updated if tools[name].get("shallow", True)]
+        for name, ok in zip(shallow_updated, self.run_commands([
+            (["git", "-C", tools[name]["path"], "reset", "--keep", "FETCH_HEAD"], f"Updating {name}")
+            for name in shallow_updated
+        ])):
+            if not ok:
+                updated.remove(name)
+        
+        for name in updated:
+            print(f"{Fore.GREEN}[+] {name} updated")
+        
+        # Old shallow tips pile up as unreachable objects; prune them now and then
+        now = time.time()
+        due = [name for name in updated if now - tools[name].get("last_gc", 0) > gc_interval]
+        if due:
+            self.run_commands([
+                (["git", "-C", tools[name]["path"], "reflog", "expire", "--expire=now", "--all"], f"Expiring reflog of {name}")
+                for name in due
+            ])
+            for name, ok in zip(due, self.run_commands([
+                (["git", "-C", tools[name]["path"], "gc", "--quiet", "--prune=now"], f"Compacting {name}")
+                for name in due
+            ])):
+                if ok:
+                    tools[name]["last_gc"] = now
+        
+        try:
+            registry.save()
+        except Exception as e:
+            logger.error(f"Error saving tool registry: {e}")
+    
+    def get_package_catalog(self) -> PackageCatalog:
+        catalog = PackageCatalog(self.prefix, os.path.join(self.state_dir, "catalog.json")).load()
+        if catalog.rebuilt:
+            print(f"{Fore.CYAN}[*] Indexed {len(catalog.packages)} packages from apt lists")
+        return catalog
+    
+    def browse_catalog(self):
+        """Search the apt catalog and queue packages for one batched install"""
+        catalog = self.get_package_catalog()
+        if not catalog.packages:
+            print(f"{Fore.RED}[-] No apt package lists found, run Update All Packages first")
+            return
+        
+        installed = self.get_installed_index()
+        queue: List[str] = []
+        while True:
+            query = input(f"\n{Fore.YELLOW}Search packages (Enter=install queue, q=back): {Fore.WHITE}").strip()
+            if query.lower() == "q":
+                return
+            if not query:
+                break
+            
+            results = catalog.search(query)
+            if not results:
+                print(f"{Fore.RED}[-] No matches for '{query}'")
+                continue
+            
+            table = rich_table(title=f"Matches for '{query}'")
+            table.add_column("#", justify="right")
+            table.add_column("Package")
+            table.add_column("Size", justify="right")
+            table.add_column("Description")
+            for number, (name, entry) in enumerate(results, 1):
+                mark = " [green](installed)[/green]" if installed.is_installed(name) else ""
+                mark += " [cyan](queued)[/cyan]" if name in queue else ""
+                table.add_row(str(number), f"{name}{mark}", format_size(entry[2]), entry[1][:50])
+            get_console().print(table)
+            
+            picks = input(f"{Fore.YELLOW}Queue which? [e.g. 1,3-5 / Enter=none]: {Fore.WHITE}").strip()
+            for part in picks.replace(" ", ",").split(","):
+                first, _, last = part.partition("-")
+                if not first.isdigit() or (last and not last.isdigit()):
+                    continue
+                for number in range(int(first), int(last or first) + 1):
+                    if 1 <= number <= len(results):
+                        name = results[number - 1][0]
+                        if name in queue:
+                            queue.remove(name)
+                        else:
+                            queue.append(name)
+            if queue:
+                print(f"{Fore.CYAN}[*] Queue: {', '.join(queue)}")
+        
+        if not queue:
+            return
+        if self.install_packages(queue):
+            print(f"{Fore.GREEN}[✓] Installed {len(queue)} packages")
+        else:
+            print(f"{Fore.YELLOW}[!] Some packages failed, see setup.log")
+    
+    def measured_throughput(self) -> Optional[float]:
+        """Best mirror throughput (bytes/s) recorded by the last mirror benchmark"""
+        try:
+            with open(os.path.join(self.state_dir, "mirrors.json"), "r") as f:
+                results = json.load(f).get("results", [])
+        except (OSError, ValueError):
+            return None
+        speeds = [r["throughput"] for r in results if not r.get("error") and r.get("throughput")]
+        return max(speeds) if speeds else None
+    
+    def plan_profile(self) -> Dict:
+        """Dependency closure of the profile minus installed packages, with sizes"""
+        catalog = PackageCatalog(self.prefix, os.path.join(self.state_dir, "catalog.json")).load()
+        installed = InstalledIndex(self.prefix).load()
+        seen: set = set()
+        plan = {"profile": self.profile["name"], "sections": [], "unavailable": [], "packages": [],
+                "download": 0, "installed_size": 0, "throughput": self.measured_throughput()}
+        
+        for section in ("core", "security", "extra"):
+            needed, unavailable = catalog.closure(self.profile[section], seen)
+            new = [name for name in needed if self.force or not installed.is_installed(name)]
+            download = sum(catalog.packages[name][2] for name in new)
+            installed_size = sum(catalog.packages[name][3] for name in new)
+            plan["sections"].append({"section": section, "requested": len(self.profile[section]),
+                                     "closure": len(needed), "new": len(new),
+                                     "download": download, "installed_size": installed_size})
+            plan["unavailable"] += unavailable
+            plan["packages"] += [{"name": name, "section": section, "version": catalog.packages[name][0],
+                                  "download": catalog.packages[name][2],
+                                  "installed_size": catalog.packages[name][3]} for name in new]
+            plan["download"] += download
+            plan["installed_size"] += installed_size
+        
+        modules = self.profile["python"] if self.force else installed.missing(self.profile["python"], "pip")
+        plan["python"] = {"requested": len(self.profile["python"]), "new": modules}
+        plan["sqlmap"] = self.profile["sqlmap"] and (self.force or not os.path.isdir(os.path.join(self.tools_dir, "sqlmap", ".git")))
+        plan["eta"] = plan["download"] / plan["throughput"] if plan["throughput"] else None
+        plan["catalog_empty"] = not catalog.packages
+        return plan
+    
+    def dry_run(self) -> bool:
+        """Print what the profile would install without changing anything"""
+        plan = self.plan_profile()
+        print(f"\n{Fore.CYAN}[*] Dry run for profile '{self.profile['name']}': {self.profile['description']}")
+        if plan["catalog_empty"]:
+            print(f"{Fore.RED}[-] No apt package lists under {self.prefix}, run 'pkg update' first")
+            return False
+        
+        table = rich_table(title="Install Plan")
+        table.add_column("Section")
+        table.add_column("Requested", justify="right")
+        table.add_column("With deps", justify="right")
+        table.add_column("To install", justify="right")
+        table.add_column("Download", justify="right")
+        table.add_column("Installed", justify="right")
+        for entry in plan["sections"]:
+            table.add_row(entry["section"], str(entry["requested"]), str(entry["closure"]), str(entry["new"]),
+                          format_size(entry["download"]), format_size(entry["installed_size"]))
+        get_console().print(table)
+        
+        heaviest = sorted(plan["packages"], key=lambda p: p["download"], reverse=True)[:8]
+        if heaviest:
+            print(f"{Fore.YELLOW}Largest downloads:")
+            for package in heaviest:
+                print(f"  • {package['name']:<24} {format_size(package['download']):>10}  ({package['section']})")
+        
+        new_modules = plan["python"]["new"]
+        print(f"{Fore.CYAN}[*] Python modules to install: {len(new_modules)} of {plan['python']['requested']}"
+              f"{' (' + ', '.join(new_modules) + ')' if new_modules else ''}, sizes not in apt index")
+        if plan["sqlmap"]:
+            print(f"{Fore.CYAN}[*] sqlmap will be cloned from GitHub")
+        if plan["unavailable"]:
+            print(f"{Fore.RED}[-] Not in the apt index: {', '.join(plan['unavailable'])}")
+        
+        print(f"{Fore.GREEN}[+] Total: {len(plan['packages'])} packages, download {format_size(plan['download'])}, "
+              f"installed {format_size(plan['installed_size'])}")
+        if plan["eta"] is not None:
+            print(f"{Fore.GREEN}[+] Estimated download time: {plan['eta']:.0f}s at {format_size(plan['throughput'])}/s "
+                  f"(last mirror benchmark)")
+        else:
+            print(f"{Fore.YELLOW}[!] No mirror throughput measured yet; a Full Termux Setup records it")
+        return not plan["unavailable"]
+    
+    def manage_wordlists(self):
+        """Import, merge and query wordlists in ~/wordlists"""
+        store = WordlistStore(self.wordlists_dir)
+        print(f"\n{Fore.GREEN}[*] Wordlists in {self.wordlists_dir}:")
+        for name, count in store.list_names().items():
+            print(f"{Fore.CYAN}  • {name}.txt ({count} words)")
+        
+        action = input(f"{Fore.YELLOW}[i]mport/merge, [l]ookup, [p]refix search, Enter=back: {Fore.WHITE}").strip().lower()
+        if action == "i":
+            sources = [path.strip() for path in input(f"{Fore.YELLOW}Source files (comma separated, .gz/.xz ok): {Fore.WHITE}").split(",") if path.strip()]
+            name = input(f"{Fore.YELLOW}Target list name [merged]: {Fore.WHITE}").strip() or "merged"
+            missing = [path for path in sources if not os.path.isfile(os.path.expanduser(path))]
+            if missing:
+                print(f"{Fore.RED}[-] Not found: {', '.join(missing)}")
+                return
+            start = time.monotonic()
+            stats = store.import_lists(name, [os.path.expanduser(path) for path in sources])
+            print(f"{Fore.GREEN}[✓] {name}.txt: read {stats['read']} words, {stats['unique']} unique "
+                  f"({time.monotonic() - start:.1f}s)")
+        elif action in ("l", "p"):
+            name = input(f"{Fore.YELLOW}List name [merged]: {Fore.WHITE}").strip() or "merged"
+            if name not in store.list_names():
+                print(f"{Fore.RED}[-] No such wordlist: {name}")
+                return
+            word = input(f"{Fore.YELLOW}Word: {Fore.WHITE}")
+            if action == "l":
+                found = store.contains(name, word)
+                print(f"{Fore.GREEN}[+] present" if found else f"{Fore.RED}[-] not present")
+            else:
+                # The smallest string above every word with this prefix
+                matches = store.range(name, word, word + "\U0010ffff", limit=50)
+                for match in matches:
+                    print(f"  {match}")
+                print(f"{Fore.CYAN}[*] {len(matches)} shown")
+    
+    def reclaim_space(self):
+        """Report reclaimable storage by category and clean the selected ones"""
+        print(f"\n{Fore.GREEN}[*] Analyzing storage...")
+        roots = [self.prefix, os.path.join(self.home_dir, ".cache"), self.tools_dir, self.scripts_dir, self.wordlists_dir]
+        scanner = SpaceScanner(roots, self.prefix, self.home_dir, self.tools_dir,
+                               installed=InstalledIndex.read_dpkg_status(InstalledIndex(self.prefix).status_file))
+        start = time.monotonic()
+        totals = scanner.scan()
+        elapsed = time.monotonic() - start
+        
+        categories = list(SpaceScanner.CATEGORIES)
+        table = rich_table(title=f"Storage ({elapsed:.1f}s scan)")
+        table.add_column("#", justify="right")
+        table.add_column("Category")
+        table.add_column("Files", justify="right")
+        table.add_column("Size", justify="right")
+        for number, name in enumerate(categories, 1):
+            table.add_row(str(number), SpaceScanner.CATEGORIES[name], str(scanner.counts[name]), format_size(totals[name]))
+        table.add_row("", "everything else", str(scanner.counts["other"]), format_size(totals["other"]))
+        get_console().print(table)
+        
+        choice = input(f"{Fore.YELLOW}Reclaim which? [e.g. 1,3 / a=all / Enter=none]: {Fore.WHITE}").strip().lower()
+        if not choice:
+            return
+        if choice == "a":
+            selected = categories
+        else:
+            selected = [categories[int(n) - 1] for n in re.findall(r"\d+", choice) if 0 < int(n) <= len(categories)]
         
-        for tool_name, tool_path in tools_to_update.items():
-            if os.path.exists(tool_path):
-                print(f"{Fore.CYAN}[*] Updating {tool_name}...")
-                self.run_command(["git", "-C", tool_path, "pull"], f"Updating {tool_name}")
+        freed = 0
+        if "pip-cache" in selected and self.run_command(["pip", "cache", "purge"], "Purging pip cache"):
+            freed += totals["pip-cache"]
+        if "pycache" in selected:
+            for path in scanner.paths["pycache"]:
+                shutil.rmtree(path, ignore_errors=True)
+            freed += totals["pycache"]
+        if "apt-lists" in selected:
+            with self.dpkg_lock:
+                for path in scanner.paths["apt-lists"]:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            freed += totals["apt-lists"]
+        if "debs" in selected:
+            # Only archives of packages that are no longer installed at that version
+            with self.dpkg_lock:
+                for path in scanner.paths["debs"]:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            freed += totals["debs"]
+        if "git-objects" in selected:
+            repos = scanner.git_repositories()
+            before = totals["git-objects"]
+            self.run_commands([(["git", "-C", repo, "gc", "--quiet", "--prune=now"], f"Compacting {os.path.basename(repo)}")
+                               for repo in repos])
+            after = SpaceScanner([os.path.join(repo, ".git", "objects") for repo in repos],
+                                 self.prefix, self.home_dir, self.tools_dir).scan()["git-objects"]
+            freed += max(before - after, 0)
+        
+        print(f"{Fore.GREEN}[✓] Reclaimed about {format_size(freed)}")
     
     def fix_broken_termux(self):
         """Fix common Termux issues"""
@@ -369,49 +3284,189 @@ alias la='ls $LS_OPTIONS -la'
         for cmd, desc in fixes:
             self.run_command(cmd, desc)
         
-        # Fix shebangs for all files in ~/bin
+        # Fix shebangs and permissions; everything in ~/bin is meant to be executable
+        fixer = ShebangFixer(self.prefix, self.home_dir)
         bin_dir = os.path.join(self.home_dir, "bin")
-        if os.path.exists(bin_dir):
-            for script in glob.glob(os.path.join(bin_dir, "*")):
-                self.run_command(["termux-fix-shebang", script], f"Fixing shebang for {os.path.basename(script)}")
+        for directory, make_executable in ((bin_dir, True), (self.tools_dir, False), (self.scripts_dir, False)):
+            if os.path.isdir(directory):
+                fixer.fix_tree(directory, make_executable)
         
-        # Fix permissions
-        if os.path.exists(bin_dir):
-            self.run_command(["chmod", "-R", "+x", bin_dir], "Fixing permissions")
+        stats = fixer.stats
+        print(f"{Fore.GREEN}[+] Scanned {stats['scanned']} files: fixed {stats['shebangs']} shebangs, "
+              f"{stats['modes']} permissions")
+        if stats["repos"]:
+            print(f"{Fore.CYAN}[*] Left {stats['repos']} git checkouts untouched")
+        if stats["errors"]:
+            print(f"{Fore.RED}[-] {stats['errors']} files could not be fixed (see setup.log)")
         
         print(f"{Fore.GREEN}[✓] Fixes applied!")
     
+    def full_setup_steps(self) -> List[SetupStep]:
+        """Steps of the full setup with what each needs and provides"""
+        steps = [
+            SetupStep("Mirror Selection", self.select_fastest_mirror, provides=["mirror"], dpkg_lock=True),
+            SetupStep("Termux Setup", self.update_package_lists, needs=["mirror"], provides=["pkg-index"], dpkg_lock=True),
+            SetupStep("Environment", self.prepare_environment, provides=["directories"]),
+            SetupStep("Core Packages", self.install_core_packages, needs=["pkg-index"],
+                      provides=["python-pip", "git", "clang", "make"], dpkg_lock=True),
+            SetupStep("Security Packages", self.install_security_packages, needs=["pkg-index"], dpkg_lock=True),
+            SetupStep("sqlmap", self.install_sqlmap, needs=["git", "directories"]),
+            SetupStep("Python Modules", self.install_python_modules, needs=["python-pip", "clang", "make"]),
+            SetupStep("Extra Utilities", self.install_extra_utilities, needs=["pkg-index"], dpkg_lock=True),
+            SetupStep("System Optimization", self.optimize_system,
+                      needs=["Core Packages", "Security Packages", "Extra Utilities"], dpkg_lock=True),
+        ]
+        if not self.profile["sqlmap"]:
+            steps = [step for step in steps if step.name != "sqlmap"]
+        return steps
+    
     def full_setup(self):
-        """Perform full Termux setup"""
+        """Perform full Termux setup, resuming an interrupted run"""
         print(f"\n{Fore.MAGENTA}{'='*45}")
         print(f"{Fore.CYAN}      STARTING FULL SETUP")
         print(f"{Fore.MAGENTA}{'='*45}")
         
-        steps = [
-            ("Termux Setup", self.setup_termux),
-            ("Core Packages", self.install_core_packages),
-            ("Security Tools", self.install_security_tools),
-            ("Python Modules", self.install_python_modules),
-            ("Extra Utilities", self.install_extra_utilities),
-            ("System Optimization", self.optimize_system)
-        ]
+        self.journal.load().start_run(force=self.force, profile=self.profile["name"])
+        
+        steps = []
+        for step in self.full_setup_steps():
+            if self.journal.is_step_done(step.name):
+                print(f"{Fore.CYAN}[*] {step.name} already done, resuming after it")
+            else:
+                steps.append(step)
         
-        for step_name, step_func in steps:
-            print(f"\n{Fore.YELLOW}▶ {step_name}")
+        def record_step(entry: Dict):
             try:
-                step_func()
-                print(f"{Fore.GREEN}✓ {step_name} completed")
+                self.journal.record_step(entry["name"], "done" if entry["status"] == "ok" else entry["status"])
             except Exception as e:
-                print(f"{Fore.RED}✗ {step_name} failed: {e}")
-                logger.error(f"Step {step_name} failed: {e}")
+                logger.error(f"Error writing journal: {e}")
+        
+        scheduler = StepScheduler(steps, dpkg_lock=self.dpkg_lock, on_step_done=record_step, trace=self.trace)
+        timeline = scheduler.run()
+        scheduler.display_timeline()
+        
+        if all(entry["status"] == "ok" for entry in timeline):
+            self.journal.finish_run()
         
         self.display_summary()
     
-    def display_summary(self):
-        """Display installation summary"""
+    def save_trace(self) -> Optional[str]:
+        """Export the run trace as JSONL (and Chrome trace if requested)"""
+        if not self.trace.events:
+            return None
+        try:
+            path = self.trace.export_jsonl()
+            if self.chrome_trace_path:
+                self.trace.export_chrome(self.chrome_trace_path)
+            return path
+        except Exception as e:
+            logger.error(f"Error saving trace: {e}")
+            return None
+    
+    def slowest_operations(self, count: int = 5) -> str:
+        """Summary lines for the slowest commands of this run"""
+        lines = []
+        for event in self.trace.slowest(count):
+            status = "ok" if event["exit_code"] == 0 else f"exit {event['exit_code']}"
+            lines.append(f"  • {event['duration']:7.1f}s  {event['name']} ({status}, "
+                         f"{format_size(event['output_bytes'])} output)")
+        return "\n".join(lines)
+    
+    def verification_items(self) -> List[Dict]:
+        """What the current profile should have installed; core and security items are required"""
+        items = []
+        for section in ("core", "security", "extra"):
+            for package in self.profile[section]:
+                items.append({"name": package, "kind": "package", "section": section,
+                              "command": PACKAGE_COMMANDS.get(package, package),
+                              "required": section != "extra"})
+        if self.profile["sqlmap"]:
+            items.append({"name": "sqlmap", "kind": "command", "section": "security",
+                          "command": "sqlmap", "required": True})
+        for module in self.profile["python"]:
+            items.append({"name": module, "kind": "module", "section": "python", "required": False})
+        return items
+    
+    def verification_path(self) -> str:
+        """Where verification looks for commands: PATH plus ~/bin for git tools"""
+        return os.pathsep.join([os.environ.get("PATH", ""), os.path.join(self.home_dir, "bin")])
+    
+    def verify_installation(self) -> Dict:
+        """Probe everything the profile installs and write a JSON report"""
+        verifier = InstallVerifier(os.path.join(self.state_dir, "verify-cache.json"),
+                                   InstalledIndex(self.prefix).load(), self.verification_path())
+        report = verifier.run(self.verification_items())
+        report["profile"] = self.profile["name"]
+        
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            report_path = os.path.join(self.state_dir, "verify-report.json")
+            with open(report_path, "w") as f:
+                json.dump(report, f, indent=2)
+            report["path"] = report_path
+        except Exception as e:
+            logger.error(f"Error writing verify report: {e}")
+        return report
+    
+    def display_verification(self, report: Dict):
+        table = rich_table(title=f"Verification ({report['elapsed']:.1f}s, {report['cache_hits']} cached)")
+        table.add_column("Item")
+        table.add_column("Section")
+        table.add_column("Status")
+        table.add_column("Version / Location", overflow="fold")
+        styles = {"ok": "green", "no version": "yellow", "installed": "green", "no command": "yellow",
+                  "broken": "red"}
+        for result in report["results"]:
+            style = styles.get(result["status"], "red" if result["required"] else "yellow")
+            table.add_row(result["name"], result["section"], f"[{style}]{result['status']}[/{style}]",
+                          result["version"] or result["path"] or "")
+        get_console().print(table)
+    
+    def verify(self) -> bool:
+        """Verify the install for the current profile; False when required items are missing"""
+        report = self.verify_installation()
+        self.display_verification(report)
+        print(f"{Fore.GREEN}[+] {report['passed']}/{len(report['results'])} checks passed")
+        if report["missing"]:
+            print(f"{Fore.YELLOW}[!] Missing: {', '.join(report['missing'])}")
+        if report["required_missing"]:
+            print(f"{Fore.RED}[-] Required items missing: {', '.join(report['required_missing'])}")
+        if report.get("path"):
+            print(f"{Fore.CYAN}[*] Report: {report['path']}")
+        return report["ok"]
+    
+    def display_summary(self) -> bool:
+        """Display installation summary from a verification of what is actually installed"""
+        report = self.verify_installation()
+        self.display_verification(report)
+        trace_path = self.save_trace()
+        slowest = ""
+        if trace_path:
+            slowest = f"""
+{Fore.YELLOW}⏱  Slowest Operations:
+{self.slowest_operations()}
+  Trace: {trace_path}
+"""
+        
+        if report["ok"] and not report["missing"]:
+            headline = f"{Fore.GREEN}         SETUP COMPLETED SUCCESSFULLY!"
+        elif report["ok"]:
+            headline = f"{Fore.YELLOW}      SETUP COMPLETED WITH WARNINGS"
+        else:
+            headline = f"{Fore.RED}            SETUP INCOMPLETE"
+        
+        missing = ""
+        if report["missing"]:
+            missing = f"""
+{Fore.RED}❌ Missing:
+  • Required: {', '.join(report['required_missing']) or 'none'}
+  • Optional: {', '.join(n for n in report['missing'] if n not in report['required_missing']) or 'none'}
+  Rerun the matching menu option, then check setup.log
+"""
+        
         summary = f"""
 {Fore.CYAN}{'='*45}
-{Fore.GREEN}         SETUP COMPLETED SUCCESSFULLY!
+{headline}
 {Fore.CYAN}{'='*45}
 
 {Fore.YELLOW}📁 Directories Created:
@@ -419,34 +3474,17 @@ alias la='ls $LS_OPTIONS -la'
   • {self.scripts_dir}
   • {self.wordlists_dir}
 
-{Fore.BLUE}🔧 Tools Installed:
-  • Python 3 + pip
-  • Git, curl, wget
-  • Nmap, Hydra, Nikto
-  • SQLMap (cloned to tools/)
-  • Development tools (clang, make, cmake)
-  • System utilities (htop, neofetch, tree, ncdu)
-  • Text processing (jq, ripgrep, fd, bat, exa)
-  • Networking tools (netcat, socat, tcpdump, traceroute)
-  • File transfer (rsync, rclone, aria2)
-  • Programming languages (nodejs, golang, rust, php, perl, ruby, java)
-  • Terminal multiplexers (tmux, screen)
-  • File managers (ranger, mc)
-  • Media tools (ffmpeg, imagemagick, yt-dlp)
-  • Security tools (proxychains, tor)
-
-{Fore.MAGENTA}🐍 Python Modules:
-  • requests, rich, colorama, tqdm
-  • scapy, beautifulsoup4, pillow
-  • pycryptodome, paramiko
-
+{Fore.BLUE}🔧 Verified ({self.profile['name']} profile):
+  • {report['passed']}/{len(report['results'])} packages, tools and Python modules present
+  • Report: {report.get('path', 'not saved')}
+{missing}
 {Fore.GREEN}🚀 Quick Start Commands:
   • sqlmap    : Start SQLMap
   • nmap      : Network scanner
   • htop      : System monitor
   • neofetch  : System info
   • python3   : Python interpreter
-
+{slowest}
 {Fore.CYAN}💡 Next Steps:
   1. Restart Termux session
   2. Start hacking in ~/tools/
@@ -461,6 +3499,9 @@ alias la='ls $LS_OPTIONS -la'
             f.write(summary.replace(Fore.CYAN, "").replace(Fore.GREEN, "")
                    .replace(Fore.YELLOW, "").replace(Fore.BLUE, "")
                    .replace(Fore.MAGENTA, "").replace(Fore.RED, ""))
+            for result in report["results"]:
+                f.write(f"{result['status']:<11} {result['section']:<9} {result['name']:<20} {result['version'] or ''}\n")
+        return report["ok"]
     
     def display_menu(self):
         """Display mobile-friendly menu"""
@@ -480,13 +3521,16 @@ alias la='ls $LS_OPTIONS -la'
 {Fore.RED}[5] {Fore.RED}Install Python Modules
 {Fore.RED}[6] {Fore.RED}Install Security Tools
 {Fore.RED}[7] {Fore.RED}Install Extra Utilities
+{Fore.RED}[8] {Fore.RED}Reclaim Space
+{Fore.RED}[9] {Fore.RED}Wordlist Manager
+{Fore.RED}[10] {Fore.RED}Package Catalog
 {Fore.RED}[0] {Fore.RED}Exit
 
 {Fore.CYAN}{'═'*40}
 """
             print(menu_text)
             
-            choice = input(f"{Fore.YELLOW}Select option [0-7]: {Fore.WHITE}").strip()
+            choice = input(f"{Fore.YELLOW}Select option [0-10]: {Fore.WHITE}").strip()
             
             if choice == "1":
                 self.full_setup()
@@ -510,7 +3554,17 @@ alias la='ls $LS_OPTIONS -la'
             elif choice == "7":
                 self.install_extra_utilities()
                 input(f"\n{Fore.CYAN}Press Enter to continue...")
+            elif choice == "8":
+                self.reclaim_space()
+                input(f"\n{Fore.CYAN}Press Enter to continue...")
+            elif choice == "9":
+                self.manage_wordlists()
+                input(f"\n{Fore.CYAN}Press Enter to continue...")
+            elif choice == "10":
+                self.browse_catalog()
+                input(f"\n{Fore.CYAN}Press Enter to continue...")
             elif choice == "0":
+                self.save_trace()
                 print(f"\n{Fore.GREEN}Thank you for using BLACK MUMBA!")
                 print(f"{Fore.CYAN}Goodbye! 👋")
                 sys.exit(0)
@@ -518,10 +3572,101 @@ alias la='ls $LS_OPTIONS -la'
                 print(f"\n{Fore.RED}Invalid option! Please try again.")
                 time.sleep(1)
 
+def parse_importtime(lines: List[str]) -> List[Tuple[str, int, int]]:
+    """Parse top-level entries of -X importtime output into (module, self_us, cumulative_us)"""
+    entries = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        name = fields[2].rstrip()
+        # Nested imports are indented under the module that pulled them in
+        if name.startswith("  "):
+            continue
+        entries.append((name.strip(), int(fields[0]), int(fields[1])))
+    return entries
+
+def startup_profile(top: int = 15) -> int:
+    """Report where cold-start import time goes, in the style of -X importtime"""
+    marker = "--- deferred ---"
+    deferred = ["rich.console", "rich.progress", "rich.table", "asyncio", "concurrent.futures", "urllib.request"]
+    code = (
+        "import importlib.util, sys\n"
+        f"spec = importlib.util.spec_from_file_location('blackmumba_profile', {os.path.abspath(__file__)!r})\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+        f"print({marker!r}, file=sys.stderr, flush=True)\n"
+        f"for name in {deferred!r}:\n"
+        "    __import__(name)\n"
+    )
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    
+    lines = result.stderr.splitlines()
+    split = lines.index(marker) if marker in lines else len(lines)
+    startup = parse_importtime(lines[:split])
+    on_demand = parse_importtime(lines[split + 1:])
+    
+    print(f"\n{Fore.CYAN}Startup import profile (process wall time {elapsed * 1000:.0f} ms)")
+    print(f"{Fore.YELLOW}{'cumulative':>12} {'self':>10}  module")
+    for name, self_us, cumulative_us in sorted(startup, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
+    print(f"{Fore.GREEN}Imports before menu: {sum(e[2] for e in startup) / 1000:.1f} ms")
+    print(f"{Fore.CYAN}Deferred until first use: {sum(e[2] for e in on_demand) / 1000:.1f} ms "
+          f"({', '.join(e[0] for e in sorted(on_demand, key=lambda e: e[2], reverse=True)[:5])})")
+    return result.returncode
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="BLACK MUMBA - Termux Setup Tool")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the setup journal and installed-state index, rerun everything")
+    parser.add_argument("--pip-index", metavar="URL_OR_DIR",
+                        help="simple index used to find Python module upgrades (default: PyPI)")
+    parser.add_argument("--chrome-trace", metavar="FILE",
+                        help="also write the run trace in Chrome trace format")
+    parser.add_argument("--profile", metavar="NAME_OR_FILE", default="default",
+                        help="package profile (TOML/JSON) from profiles/ or ~/.blackmumba/profiles")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print the install plan for the profile (sizes, time estimate) and exit")
+    parser.add_argument("--no-prefetch", action="store_true",
+                        help="let apt download archives itself instead of the parallel prefetcher")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="report the import-time breakdown of a cold start and exit")
+    
+    commands = parser.add_subparsers(dest="command")
+    export_parser = commands.add_parser("export-bundle", help="pack installed packages, wheels and tools for offline use")
+    export_parser.add_argument("path", help="bundle file to write")
+    import_parser = commands.add_parser("import-bundle", help="install everything from an offline bundle")
+    import_parser.add_argument("path", help="bundle file to read")
+    commands.add_parser("verify", help="check the profile's tools and modules; exit 1 if required ones are missing")
+    return parser.parse_args(argv)
+
 def main():
     """Main entry point"""
+    args = parse_args()
+    if args.startup_profile:
+        sys.exit(startup_profile())
+    
+    setup = None
     try:
         setup = BLACK_MUMBASetup()
+        setup.force = args.force
+        setup.chrome_trace_path = args.chrome_trace
+        setup.prefetch = not args.no_prefetch
+        if args.pip_index:
+            setup.pip_index = args.pip_index
+        try:
+            setup.profile = load_profile(args.profile)
+        except Exception as e:
+            print(f"{Fore.RED}[-] Invalid profile: {e}")
+            sys.exit(2)
+        
+        if args.dry_run:
+            sys.exit(0 if setup.dry_run() else 1)
         
         # Check if running in Termux
         if not setup.is_termux:
@@ -534,11 +3679,24 @@ def main():
         # Check for dependencies
         setup.check_root()
         
+        if args.command == "export-bundle":
+            success = setup.export_bundle(args.path)
+            setup.save_trace()
+            sys.exit(0 if success else 1)
+        elif args.command == "import-bundle":
+            success = setup.import_bundle(args.path)
+            setup.save_trace()
+            sys.exit(0 if success else 1)
+        elif args.command == "verify":
+            sys.exit(0 if setup.verify() else 1)
+        
         # Start the setup
         setup.display_menu()
         
     except KeyboardInterrupt:
         print(f"\n\n{Fore.YELLOW}Setup interrupted by user")
+        if setup:
+            setup.save_trace()
         sys.exit(0)
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import setup as bm
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    """HOME and PREFIX in a temp dir with an empty dpkg status"""
+    home = tmp_path / "home"
+    prefix = tmp_path / "usr"
+    (prefix / "var" / "lib" / "dpkg").mkdir(parents=True)
+    (prefix / "var" / "lib" / "dpkg" / "status").write_text("")
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("PREFIX", str(prefix))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def setup_instance(sandbox):
+    instance = bm.BLACK_MUMBASetup()
+    instance.mirror_candidates = []
+    # Tests fake run_command; the prefetch stage would otherwise query the host's apt
+    instance.prefetch = False
+    return instance
+
+
+@pytest.fixture
+def http_server(tmp_path):
+    """Serve tmp_path/www over HTTP; server.ranges toggles byte-range support"""
+    import http.server
+    import re
+    import threading
+    
+    root = tmp_path / "www"
+    root.mkdir()
+    
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+        
+        def do_GET(self):
+            path = root / self.path.lstrip("/")
+            if not path.is_file():
+                self.send_error(404)
+                return
+            data = path.read_bytes()
+            server.requests.append((self.path, self.headers.get("Range")))
+            match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range") or "")
+            if server.ranges and match:
+                start, end = int(match.group(1)), int(match.group(2))
+                body = data[start:end + 1]
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            else:
+                body = data
+                self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+    
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.root = root
+    server.ranges = True
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
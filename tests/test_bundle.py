@@ -0,0 +1,74 @@
+import os
+import tarfile
+
+
+def prepare(instance, sandbox, wheels, archives=("nmap_7.94_aarch64.deb", "git_2.4_aarch64.deb"),
+            installed=(("nmap", "7.94"), ("git", "2.4"))):
+    archive_dir = sandbox / "usr" / "var" / "cache" / "apt" / "archives"
+    archive_dir.mkdir(parents=True)
+    for name in archives:
+        (archive_dir / name).write_bytes(b"deb")
+    (sandbox / "usr" / "var" / "lib" / "dpkg" / "status").write_text("".join(
+        f"Package: {name}\nStatus: install ok installed\nVersion: {version}\n\n" for name, version in installed))
+    instance.profile = dict(instance.profile, core=["git"], security=["nmap"], extra=[], python=["requests", "rich"])
+    instance.resolve_dependencies = lambda packages: list(packages)
+    downloads = []
+    
+    def run_command(command, description="", cwd=None, on_output=None):
+        if command[:2] == ["pip", "wheel"]:
+            for module in wheels:
+                open(os.path.join(command[3], f"{module}-1.0-py3-none-any.whl"), "w").close()
+        if command[:2] == ["apt-get", "download"]:
+            downloads.extend(command[2:])
+            # Packages unknown to dpkg stand in for ones apt cannot fetch
+            for package, version in installed:
+                if package in command[2:]:
+                    open(os.path.join(cwd, f"{package}_{version.replace(':', '%3a')}_aarch64.deb"), "w").close()
+        return True
+    
+    instance.run_command = run_command
+    return downloads
+
+
+def bundled_debs(bundle):
+    with tarfile.open(bundle) as tar:
+        return sorted(name for name in tar.getnames() if name.startswith("debs/"))
+
+
+def test_export_fails_when_a_wheel_is_missing(setup_instance, sandbox):
+    prepare(setup_instance, sandbox, ["requests"])
+    bundle = sandbox / "bundle.tar"
+    
+    assert setup_instance.export_bundle(str(bundle)) is False
+    assert not bundle.exists()
+
+
+def test_export_writes_complete_bundle(setup_instance, sandbox):
+    downloads = prepare(setup_instance, sandbox, ["requests", "rich"])
+    bundle = sandbox / "bundle.tar"
+    
+    assert setup_instance.export_bundle(str(bundle)) is True
+    assert downloads == []
+    assert bundled_debs(bundle) == ["debs/git_2.4_aarch64.deb", "debs/nmap_7.94_aarch64.deb"]
+
+
+def test_export_uses_the_installed_version(setup_instance, sandbox):
+    downloads = prepare(setup_instance, sandbox, ["requests", "rich"],
+                        archives=("git_2.3_aarch64.deb", "git_1%3a2.4_aarch64.deb", "git_2.5_aarch64.deb",
+                                  "nmap_7.93_aarch64.deb"),
+                        installed=(("git", "1:2.4"), ("nmap", "7.94")))
+    bundle = sandbox / "bundle.tar"
+    
+    assert setup_instance.export_bundle(str(bundle)) is True
+    # Only nmap's cached archive is stale, so only nmap is downloaded
+    assert downloads == ["nmap"]
+    assert bundled_debs(bundle) == ["debs/git_1%3a2.4_aarch64.deb", "debs/nmap_7.94_aarch64.deb"]
+
+
+def test_export_fails_when_an_archive_is_missing(setup_instance, sandbox):
+    prepare(setup_instance, sandbox, ["requests", "rich"])
+    setup_instance.profile["security"] = ["nmap", "hydra"]
+    bundle = sandbox / "bundle.tar"
+    
+    assert setup_instance.export_bundle(str(bundle)) is False
+    assert not bundle.exists()
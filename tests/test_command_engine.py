@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+
+import setup as bm
+
+
+def test_concurrent_run_all_calls_share_the_limits(tmp_path):
+    engine = bm.CommandEngine(limits={"default": 1})
+    # mkdir fails if another holder of the slot is still inside
+    command = ["sh", "-c", f"mkdir {tmp_path}/held || exit 3; sleep 0.2; rmdir {tmp_path}/held"]
+    results = []
+    threads = [threading.Thread(target=lambda: results.extend(engine.run_all([command, command])))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert [result.returncode for result in results] == [0, 0, 0, 0]
+    # Run sequentially, the engine is reusable across event loops
+    assert engine.run_all([["true"]])[0].returncode == 0
+
+
+def test_cancel_signals_the_whole_process_group(tmp_path):
+    engine = bm.CommandEngine()
+    started = tmp_path / "started"
+    signalled = tmp_path / "signalled"
+    grandchild = f"trap 'echo > {signalled}; exit 0' TERM; echo > {started}; while :; do sleep 0.1; done"
+    
+    async def cancel_while_running():
+        task = asyncio.ensure_future(engine.gather([["sh", "-c", f"sh -c \"{grandchild}\" & wait"]]))
+        while not started.exists():
+            await asyncio.sleep(0.02)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    asyncio.run(cancel_while_running())
+    deadline = time.monotonic() + 5
+    while not signalled.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert signalled.exists()
+    # The slot was released on cancellation
+    assert engine.slots["default"].acquire(blocking=False)
@@ -0,0 +1,71 @@
+import subprocess
+
+import pytest
+
+import setup as bm
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit(work, text):
+    (work / "tool.py").write_text(text)
+    git("add", "tool.py", cwd=work)
+    git("commit", "-q", "-m", text, cwd=work)
+    git("push", "-q", "origin", "HEAD:main", cwd=work)
+    return git("rev-parse", "HEAD", cwd=work)
+
+
+@pytest.fixture
+def upstream(sandbox, monkeypatch):
+    """Bare repo with a work tree for pushing new commits to it"""
+    for key in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{key}_NAME", "Test")
+        monkeypatch.setenv(f"GIT_{key}_EMAIL", "test@example.com")
+    bare = sandbox / "upstream.git"
+    work = sandbox / "work"
+    git("init", "-q", "--bare", "-b", "main", str(bare))
+    git("clone", "-q", str(bare), str(work))
+    commit(work, "v1")
+    return bare, work
+
+
+def record_commands(instance):
+    commands = []
+    run_commands = instance.run_commands
+    
+    def spy(items):
+        commands.extend(command for command, _ in items)
+        return run_commands(items)
+    
+    instance.run_commands = spy
+    return commands
+
+
+def test_update_skips_unchanged_and_fetches_shallow(setup_instance, upstream):
+    bare, work = upstream
+    clone = setup_instance.tools_dir + "/tool"
+    git("clone", "-q", "--depth", "1", f"file://{bare}", clone)
+    commands = record_commands(setup_instance)
+    
+    setup_instance.update_git_tools()
+    assert commands == []
+    
+    head = commit(work, "v2")
+    setup_instance.update_git_tools()
+    
+    assert ["git", "-C", clone, "fetch", "--depth", "1", "origin", "main"] in commands
+    assert bm.read_git_head(clone) == ("main", head)
+    assert git("rev-list", "--count", "HEAD", cwd=clone) == "1"
+    assert git("status", "--porcelain", cwd=clone) == ""
+
+
+def test_ls_remote_hash_ignores_stderr_noise():
+    head = "3f" * 20
+    output = ("warning: redirecting to https://github.com/example/tool.git/\n"
+              "Warning: Permanently added 'github.com' (ED25519) to the list of known hosts.\n"
+              f"{head}\trefs/heads/main\n")
+    assert bm.parse_ls_remote(output) == head
+    assert bm.parse_ls_remote("fatal: could not read Username\n") is None
+    assert bm.parse_ls_remote("") is None
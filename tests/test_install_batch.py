@@ -0,0 +1,40 @@
+def fake_runner(instance, broken):
+    """run_command stand-in where any batch containing a broken package fails"""
+    calls = []
+    
+    def run_command(command, description="", cwd=None, on_output=None):
+        packages = command[3:]
+        calls.append(packages)
+        return not broken.intersection(packages)
+    
+    instance.run_command = run_command
+    return calls
+
+
+def test_batch_succeeds_in_one_transaction(setup_instance):
+    calls = fake_runner(setup_instance, set())
+    
+    results = setup_instance.install_batch(["a", "b", "c", "d"])
+    
+    assert calls == [["a", "b", "c", "d"]]
+    assert all(results.values())
+
+
+def test_bisection_isolates_failing_packages(setup_instance):
+    packages = [f"p{i}" for i in range(8)]
+    calls = fake_runner(setup_instance, {"p2", "p7"})
+    
+    results = setup_instance.install_batch(packages)
+    
+    assert [p for p in packages if not results[p]] == ["p2", "p7"]
+    assert all(results[p] for p in packages if p not in ("p2", "p7"))
+    # Halves that install cleanly are never split further
+    assert ["p0", "p1"] in calls and ["p4", "p5"] in calls
+    assert len(calls) < 2 * len(packages)
+
+
+def test_install_packages_reports_failure(setup_instance):
+    fake_runner(setup_instance, {"rust"})
+    
+    assert setup_instance.install_packages(["git", "rust"]) is False
+    assert setup_instance.install_packages(["git"]) is True
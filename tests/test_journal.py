@@ -0,0 +1,66 @@
+import json
+
+import setup as bm
+
+
+def run_full_setup(instance, results):
+    """Run full_setup with steps that return the given results"""
+    calls = []
+    
+    def step(name):
+        def func():
+            calls.append(name)
+            return results[name]
+        return func
+    
+    instance.full_setup_steps = lambda: [bm.SetupStep(name, step(name)) for name in results]
+    instance.display_summary = lambda: True
+    instance.full_setup()
+    return calls
+
+
+def test_failed_step_is_retried_and_not_journaled_done(setup_instance):
+    calls = run_full_setup(setup_instance, {"Core Packages": True, "Extra Utilities": False})
+    
+    assert calls.count("Extra Utilities") == 2
+    with open(setup_instance.journal.path) as f:
+        journal = json.load(f)
+    assert journal["steps"]["Core Packages"]["status"] == "done"
+    assert journal["steps"]["Extra Utilities"]["status"] != "done"
+    assert journal["completed"] is None
+
+
+def test_resume_reruns_only_incomplete_steps(setup_instance):
+    run_full_setup(setup_instance, {"Core Packages": True, "Extra Utilities": False})
+    
+    setup_instance.journal = bm.SetupJournal(setup_instance.journal.path)
+    calls = run_full_setup(setup_instance, {"Core Packages": True, "Extra Utilities": True})
+    
+    assert calls == ["Extra Utilities"]
+    assert setup_instance.journal.data["completed"] is not None
+
+
+def test_dependents_of_a_failed_step_are_skipped(setup_instance):
+    calls = []
+    
+    def step(name, result):
+        def func():
+            calls.append(name)
+            return result
+        return func
+    
+    setup_instance.full_setup_steps = lambda: [
+        bm.SetupStep("Update Packages", step("Update Packages", False), provides=["apt"], retries=0),
+        bm.SetupStep("Core Packages", step("Core Packages", True), needs=["apt"]),
+        bm.SetupStep("SQLMap", step("SQLMap", True), needs=["Core Packages"]),
+        bm.SetupStep("Storage", step("Storage", True)),
+    ]
+    setup_instance.display_summary = lambda: True
+    setup_instance.full_setup()
+    
+    assert sorted(calls) == ["Storage", "Update Packages"]
+    steps = setup_instance.journal.data["steps"]
+    assert steps["Storage"]["status"] == "done"
+    assert steps["Update Packages"]["status"] == "failed"
+    assert "Core Packages" not in steps and "SQLMap" not in steps
+    assert setup_instance.journal.data["completed"] is None
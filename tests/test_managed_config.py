@@ -0,0 +1,41 @@
+import setup as bm
+
+
+def test_block_is_written_once_and_idempotent(tmp_path):
+    rc = tmp_path / ".bashrc"
+    rc.write_text("export A=1")
+    config = bm.ManagedConfig(str(rc))
+    
+    assert config.update_block("prompt", "PS1='$ '") == 0
+    first = rc.read_text()
+    assert config.update_block("prompt", "PS1='$ '") == 0
+    
+    assert rc.read_text() == first
+    assert first == ("export A=1\n# >>> BLACK MUMBA prompt >>>\nPS1='$ '\n"
+                     "# <<< BLACK MUMBA prompt <<<\n")
+
+
+def test_update_replaces_in_place_and_removes_duplicates(tmp_path):
+    rc = tmp_path / ".bashrc"
+    legacy = "\n# old prompt\nPS1='old'\n"
+    block = "# >>> BLACK MUMBA prompt >>>\nPS1='v1'\n# <<< BLACK MUMBA prompt <<<\n"
+    rc.write_text("before\n" + block + "middle\n" + block + legacy + legacy + "after\n")
+    
+    removed = bm.ManagedConfig(str(rc)).update_block("prompt", "PS1='v2'", legacy=[legacy])
+    
+    assert removed == 3
+    assert rc.read_text() == ("before\n# >>> BLACK MUMBA prompt >>>\nPS1='v2'\n"
+                              "# <<< BLACK MUMBA prompt <<<\nmiddle\nafter\n")
+
+
+def test_shell_startup_is_timed_only_when_bashrc_changes(setup_instance, monkeypatch):
+    timed = []
+    monkeypatch.setattr(bm, "time_shell_startup", lambda rc_file, runs=3: timed.append(rc_file) or 0.01)
+    
+    setup_instance.setup_shell_prompt()
+    assert len(timed) == 2
+    first = open(timed[0]).read()
+    
+    setup_instance.setup_shell_prompt()
+    assert len(timed) == 2
+    assert open(timed[0]).read() == first
@@ -0,0 +1,24 @@
+import setup as bm
+
+
+def test_ranks_reachable_mirrors_first(http_server):
+    release = http_server.root / "good" / "dists" / "stable"
+    release.mkdir(parents=True)
+    (release / "Release").write_bytes(b"x" * 50000)
+    candidates = [f"{http_server.url}/missing", "http://127.0.0.1:1/termux", f"{http_server.url}/good"]
+    
+    results = bm.MirrorBenchmark(candidates, timeout=5).run()
+    
+    assert results[0]["url"] == f"{http_server.url}/good"
+    assert results[0]["bytes"] == 50000 and results[0]["throughput"] > 0 and not results[0]["error"]
+    assert all(r["error"] for r in results[1:])
+
+
+def test_write_sources_replaces_main_line_once(tmp_path):
+    sources = tmp_path / "sources.list"
+    sources.write_text("# comment\ndeb https://old.example/termux stable main\n")
+    
+    assert bm.MirrorBenchmark.write_sources(str(sources), "https://new.example/termux") is True
+    assert sources.read_text() == "# comment\ndeb https://new.example/termux stable main\n"
+    assert (tmp_path / "sources.list.bak").read_text().endswith("old.example/termux stable main\n")
+    assert bm.MirrorBenchmark.write_sources(str(sources), "https://new.example/termux") is False
@@ -0,0 +1,59 @@
+import setup as bm
+
+
+def write_project(root, name, anchors):
+    project = root / name
+    project.mkdir(parents=True)
+    links = "\n".join(f"<a href=\"{text}\" {attributes}>{text}</a>" for text, attributes in anchors)
+    (project / "index.html").write_text(f"<html><body>{links}</body></html>")
+
+
+def test_version_key_orders_releases():
+    versions = ["1.0", "1.0.post1", "1.0rc1", "0.9", "1!0.1", "1.10", "1.2"]
+    assert sorted(versions, key=bm.version_key) == ["0.9", "1.0rc1", "1.0", "1.0.post1", "1.2", "1.10", "1!0.1"]
+    assert bm.version_key("1.0") == bm.version_key("1.0.0")
+    assert bm.version_key("2.1.0+cpu") == bm.version_key("2.1.0")
+
+
+def test_is_prerelease():
+    for version in ("1.0rc1", "1.0b2", "2.0a1", "1.0.dev3", "1.0-alpha", "3.0.preview1", "1.0c1"):
+        assert bm.is_prerelease(version), version
+    for version in ("1.0", "1.0.post1", "2.1.0+cpu", "1.0+abc", "2024.2.2", "1.0.post1+local.rc"):
+        assert not bm.is_prerelease(version), version
+
+
+def test_python_satisfies():
+    assert bm.python_satisfies(">=3.8", (3, 11, 2))
+    assert not bm.python_satisfies(">=3.12", (3, 11, 2))
+    assert not bm.python_satisfies(">=3.6, !=3.11.*", (3, 11, 2))
+    assert bm.python_satisfies("~=3.9", (3, 11, 2))
+    assert not bm.python_satisfies("<3.11", (3, 11, 2))
+    assert bm.python_satisfies("", (3, 11, 2))
+
+
+def test_latest_skips_yanked_and_unsupported_python(tmp_path):
+    write_project(tmp_path, "demo", [
+        ("demo-1.0.tar.gz", ""),
+        ("demo-1.1-py3-none-any.whl", 'data-requires-python="&gt;=3.6"'),
+        ("demo-1.2-py3-none-any.whl", 'data-yanked=""'),
+        ("demo-2.0-py3-none-any.whl", 'data-requires-python="&gt;=99.0"'),
+        ("demo-2.1rc1.tar.gz", ""),
+    ])
+    
+    assert bm.PipIndex(str(tmp_path)).latest("demo") == "1.1"
+
+
+def test_outdated_counts_lookup_failures(tmp_path):
+    write_project(tmp_path, "demo", [("demo-1.1.tar.gz", "")])
+    def offline(name):
+        raise OSError("offline")
+    
+    index = bm.PipIndex(str(tmp_path))
+    index.links = offline
+    
+    assert index.outdated({"demo": "1.0"}, ["demo"]) == {}
+    assert index.failed == ["demo"]
+    
+    index = bm.PipIndex(str(tmp_path))
+    assert index.outdated({"demo": "1.0"}, ["demo"]) == {"demo": ("1.0", "1.1")}
+    assert index.failed == []
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import random
+
+import pytest
+
+import setup as bm
+
+
+def publish(server, name, size, seed=0):
+    data = random.Random(seed).randbytes(size)
+    (server.root / name).write_bytes(data)
+    return data, {"url": f"{server.url}/{name}", "filename": name, "size": size,
+                  "hash": ("sha256", hashlib.sha256(data).hexdigest())}
+
+
+def prefetcher(tmp_path):
+    return bm.ArchivePrefetcher(str(tmp_path / "archives"), segments=4, min_segment=64 * 1024, use_aria2=False)
+
+
+def test_parse_print_uris():
+    output = ("'http://m/pool/nmap_7.94_aarch64.deb' nmap_7.94_aarch64.deb 5000 SHA256:ABC\n"
+              "'http://m/pool/vim_2%3a9.0_aarch64.deb' vim_2%3a9.0_aarch64.deb 10 MD5Sum:def\n"
+              "Reading package lists...\n")
+    
+    entries = bm.parse_print_uris(output)
+    
+    assert [e["filename"] for e in entries] == ["nmap_7.94_aarch64.deb", "vim_2%3a9.0_aarch64.deb"]
+    assert entries[0]["size"] == 5000 and entries[0]["hash"] == ("sha256", "abc")
+    assert entries[1]["hash"] == ("md5", "def")
+
+
+def test_segmented_download_is_verified_and_cached(tmp_path, http_server):
+    data, entry = publish(http_server, "big_1.0_aarch64.deb", 300 * 1024)
+    _, empty = publish(http_server, "empty_1.0_aarch64.deb", 0)
+    
+    stats = prefetcher(tmp_path).download([entry, empty])
+    
+    assert stats["downloaded"] == 2 and not stats["failed"]
+    assert (tmp_path / "archives" / entry["filename"]).read_bytes() == data
+    # Four range requests for the big file, none for the empty one
+    assert [header is not None for _, header in http_server.requests] == [True] * 4
+    assert os.listdir(tmp_path / "archives" / "partial") == []
+    assert prefetcher(tmp_path).download([entry])["cached"] == 1
+
+
+def test_falls_back_to_one_stream_without_range_support(tmp_path, http_server):
+    http_server.ranges = False
+    data, entry = publish(http_server, "big_1.0_aarch64.deb", 300 * 1024)
+    
+    stats = prefetcher(tmp_path).download([entry])
+    
+    assert stats["downloaded"] == 1
+    assert (tmp_path / "archives" / entry["filename"]).read_bytes() == data
+
+
+def test_resumes_partial_segments(tmp_path, http_server):
+    data, entry = publish(http_server, "big_1.0_aarch64.deb", 300 * 1024)
+    fetcher = prefetcher(tmp_path)
+    os.makedirs(fetcher.partial_dir)
+    start, end, part = fetcher.plan(entry)[1]
+    with open(part, "wb") as f:
+        f.write(data[start:start + 1000])
+    
+    stats = fetcher.download([entry])
+    
+    assert stats["bytes"] == len(data) - 1000
+    assert ("/" + entry["filename"], f"bytes={start + 1000}-{end}") in http_server.requests
+    assert (tmp_path / "archives" / entry["filename"]).read_bytes() == data
+
+
+def test_checksum_mismatch_is_rejected(tmp_path, http_server):
+    _, entry = publish(http_server, "bad_1.0_aarch64.deb", 1000)
+    entry["hash"] = ("sha256", "0" * 64)
+    
+    stats = prefetcher(tmp_path).download([entry])
+    
+    assert stats["failed"] == ["bad_1.0_aarch64.deb"]
+    assert not (tmp_path / "archives" / entry["filename"]).exists()
+    assert os.listdir(tmp_path / "archives" / "partial") == []
+
+
+def test_prefetch_packages_lists_uris_through_run_command(setup_instance, sandbox, http_server, monkeypatch):
+    data, entry = publish(http_server, "nmap_7.94_aarch64.deb", 2000)
+    fake_bin = sandbox / "bin"
+    fake_bin.mkdir()
+    (fake_bin / "apt-get").write_text("#!/bin/sh\n")
+    os.chmod(fake_bin / "apt-get", 0o755)
+    monkeypatch.setenv("PATH", str(fake_bin))
+    commands = []
+    
+    def run_command(command, description="", cwd=None, on_output=None):
+        commands.append(command)
+        on_output(f"'{entry['url']}' {entry['filename']} {entry['size']} SHA256:{entry['hash'][1]}\n")
+        return True
+    
+    setup_instance.run_command = run_command
+    stats = setup_instance.prefetch_packages(["nmap"])
+    
+    assert commands == [["apt-get", "install", "-y", "-qq", "--print-uris", "nmap"]]
+    assert stats["downloaded"] == 1
+    assert (sandbox / "usr" / "var" / "cache" / "apt" / "archives" / entry["filename"]).read_bytes() == data
+
+
+def test_prefetch_is_skipped_without_apt_get(setup_instance, sandbox, monkeypatch):
+    monkeypatch.setenv("PATH", str(sandbox))
+    setup_instance.run_command = lambda *args, **kwargs: pytest.fail("no command expected")
+    
+    assert setup_instance.prefetch_packages(["nmap"]) == {}
@@ -0,0 +1,44 @@
+import os
+import subprocess
+
+import setup as bm
+
+
+def write(path, text, mode=0o644):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    os.chmod(path, mode)
+
+
+def test_rewrites_foreign_shebangs(tmp_path):
+    prefix = tmp_path / "usr"
+    script = tmp_path / "tools" / "run.sh"
+    write(script, "#!/bin/bash\necho hi\n")
+    
+    stats = bm.ShebangFixer(str(prefix), str(tmp_path)).fix_tree(str(tmp_path / "tools"))
+    
+    assert script.read_text() == f"#!{prefix}/bin/bash\necho hi\n"
+    assert os.access(script, os.X_OK)
+    assert stats["shebangs"] == 1
+
+
+def test_leaves_home_interpreters_alone(tmp_path):
+    venv_script = tmp_path / "tools" / "x" / "venv" / "bin" / "tool"
+    text = f"#!{tmp_path}/tools/x/venv/bin/python\nprint()\n"
+    write(venv_script, text, 0o755)
+    
+    bm.ShebangFixer(str(tmp_path / "usr"), str(tmp_path)).fix_tree(str(tmp_path / "tools"))
+    
+    assert venv_script.read_text() == text
+
+
+def test_skips_git_work_trees(tmp_path):
+    repo = tmp_path / "tools" / "repo"
+    write(repo / "a.py", "#!/usr/bin/python\n")
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    subprocess.run(["git", "-C", str(repo), "add", "a.py"], check=True)
+    
+    stats = bm.ShebangFixer(str(tmp_path / "usr"), str(tmp_path)).fix_tree(str(tmp_path / "tools"))
+    
+    assert (repo / "a.py").read_text() == "#!/usr/bin/python\n"
+    assert stats["repos"] == 1 and stats["scanned"] == 0
@@ -0,0 +1,52 @@
+import setup as bm
+
+
+def make_prefix(tmp_path, sources):
+    prefix = tmp_path / "usr"
+    lists = prefix / "var" / "lib" / "apt" / "lists"
+    archives = prefix / "var" / "cache" / "apt" / "archives"
+    lists.mkdir(parents=True)
+    archives.mkdir(parents=True)
+    (prefix / "etc" / "apt").mkdir(parents=True)
+    if sources is not None:
+        (prefix / "etc" / "apt" / "sources.list").write_text(sources)
+    return prefix, lists, archives
+
+
+def scan(tmp_path, prefix, installed=None):
+    scanner = bm.SpaceScanner([str(prefix)], str(prefix), str(tmp_path), str(tmp_path / "tools"), installed=installed)
+    scanner.scan()
+    return scanner
+
+
+def test_option_block_sources_are_not_stale(tmp_path):
+    prefix, lists, _ = make_prefix(tmp_path, "deb [trusted=yes] https://mirror.example/termux stable main\n"
+                                             "deb [ arch=aarch64 ] https://other.example/apt stable main\n")
+    live = lists / "mirror.example_termux_dists_stable_InRelease"
+    other = lists / "other.example_apt_dists_stable_InRelease"
+    stale = lists / "old.example_termux_dists_stable_InRelease"
+    for path in (live, other, stale):
+        path.write_text("x")
+    
+    scanner = scan(tmp_path, prefix)
+    
+    assert scanner.list_prefixes == ["mirror.example_termux", "other.example_apt"]
+    assert scanner.paths["apt-lists"] == [str(stale)]
+
+
+def test_no_parsed_sources_flags_nothing(tmp_path):
+    prefix, lists, _ = make_prefix(tmp_path, None)
+    (lists / "mirror.example_termux_dists_stable_InRelease").write_text("x")
+    
+    assert scan(tmp_path, prefix).paths["apt-lists"] == []
+
+
+def test_only_orphaned_debs_are_flagged(tmp_path):
+    prefix, _, archives = make_prefix(tmp_path, "")
+    for name in ("nmap_7.94_aarch64.deb", "nmap_7.93_aarch64.deb", "gone_1.0_aarch64.deb", "vim_2%3a9.0_aarch64.deb"):
+        (archives / name).write_text("x")
+    
+    scanner = scan(tmp_path, prefix, installed={"nmap": "7.94", "vim": "2:9.0"})
+    
+    assert sorted(p.rsplit("/", 1)[1] for p in scanner.paths["debs"]) == ["gone_1.0_aarch64.deb", "nmap_7.93_aarch64.deb"]
+    assert scan(tmp_path, prefix).paths["debs"] == []
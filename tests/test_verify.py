@@ -0,0 +1,55 @@
+import json
+import os
+
+import setup as bm
+
+
+def make_tool(directory, name, body):
+    path = directory / name
+    path.write_text(f"#!/bin/sh\n{body}\n")
+    os.chmod(path, 0o755)
+    return path
+
+
+def make_verifier(sandbox, bin_dir):
+    return bm.InstallVerifier(str(sandbox / "verify-cache.json"), bm.InstalledIndex(str(sandbox / "usr")),
+                              search_path=str(bin_dir))
+
+
+def item(name, required=True):
+    return {"name": name, "kind": "command", "section": "core", "command": name, "required": required}
+
+
+def test_crashing_binary_is_broken_and_not_cached(sandbox):
+    bin_dir = sandbox / "bin"
+    bin_dir.mkdir()
+    make_tool(bin_dir, "good", "echo 'good 1.2.3'")
+    broken = make_tool(bin_dir, "bad", "echo 'error while loading shared libraries: libfoo.so' >&2; exit 127")
+    
+    report = make_verifier(sandbox, bin_dir).run([item("good"), item("bad")])
+    statuses = {r["name"]: (r["status"], r["version"]) for r in report["results"]}
+    assert statuses["good"] == ("ok", "good 1.2.3")
+    assert statuses["bad"] == ("broken", None)
+    assert report["required_missing"] == ["bad"]
+    assert not report["ok"]
+    cache = json.loads((sandbox / "verify-cache.json").read_text())
+    assert not [key for key in cache if key.startswith(os.path.realpath(broken))]
+    
+    # Once fixed the binary is probed again rather than served from a cached failure
+    stat = os.stat(broken)
+    broken.write_text("#!/bin/sh\necho 'bad 2.0'\n")
+    os.utime(broken, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    report = make_verifier(sandbox, bin_dir).run([item("bad")])
+    assert report["results"][0]["status"] == "ok"
+    assert report["results"][0]["version"] == "bad 2.0"
+
+
+def test_known_nonzero_version_flag_is_accepted(sandbox):
+    bin_dir = sandbox / "bin"
+    bin_dir.mkdir()
+    make_tool(bin_dir, "hydra", "echo 'Hydra v9.5 (c) 2023 by van Hauser/THC'; exit 255")
+    
+    report = make_verifier(sandbox, bin_dir).run([item("hydra")])
+    assert report["results"][0]["status"] == "ok"
+    assert report["results"][0]["version"].startswith("Hydra v9.5")
+    assert report["ok"]
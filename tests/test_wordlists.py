@@ -0,0 +1,40 @@
+import gzip
+import lzma
+import random
+
+import setup as bm
+
+
+def test_import_merges_compressed_lists_in_bounded_memory(tmp_path):
+    rng = random.Random(1)
+    words = ["".join(rng.choice("abcdefg") for _ in range(rng.randint(1, 6))) for _ in range(20000)]
+    (tmp_path / "a.txt").write_text("\r\n".join(words[:8000]) + "\n\n")
+    with gzip.open(tmp_path / "b.gz", "wt") as f:
+        f.write("\n".join(words[8000:14000]))
+    with lzma.open(tmp_path / "c.xz", "wt") as f:
+        f.write("\n".join(words[14000:]))
+    # Tiny limits force many runs and several merge passes
+    store = bm.WordlistStore(str(tmp_path / "lists"), memory_limit=20000, stride=16, fan_in=4)
+    
+    stats = store.import_lists("m", [str(tmp_path / "a.txt"), str(tmp_path / "b.gz")])
+    assert stats["read"] == 14000
+    store.import_lists("m", [str(tmp_path / "c.xz")])
+    
+    expected = sorted(set(w.encode() for w in words))
+    assert (tmp_path / "lists" / "m.txt").read_bytes() == b"".join(w + b"\n" for w in expected)
+    assert store.list_names() == {"m": len(expected)}
+    assert sorted(p.name for p in (tmp_path / "lists").iterdir()) == ["m.idx", "m.txt"]
+
+
+def test_lookups_slices_and_ranges(tmp_path):
+    source = tmp_path / "words.txt"
+    words = sorted({f"w{i:05d}" for i in range(0, 5000, 3)})
+    source.write_text("\n".join(reversed(words)))
+    store = bm.WordlistStore(str(tmp_path / "lists"), stride=16)
+    store.import_lists("w", [str(source)])
+    
+    assert store.contains("w", "w00003") and store.contains("w", words[-1])
+    assert not store.contains("w", "w00004") and not store.contains("w", "") and not store.contains("w", "zzz")
+    assert store.slice("w", 100, 110) == words[100:110]
+    assert store.slice("w", len(words) - 2, len(words) + 5) == words[-2:]
+    assert store.range("w", "w001", "w002", limit=10000) == [w for w in words if w.startswith("w001")]